@@ -1,14 +1,34 @@
-from typing import Dict, Union, List
+from typing import Dict, Union
+from collections import OrderedDict, ChainMap
+from contextlib import contextmanager, nullcontext
+from functools import wraps
 
 # options file must be in same directory as program
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QFont
-from PyQt5.QtWidgets import QWidget, QLabel, QHBoxLayout, QPushButton, QVBoxLayout, QLayout, QLineEdit, QSpinBox, \
-    QDoubleSpinBox, QCheckBox, QComboBox, QGroupBox, QRadioButton, QFrame
 from ast import literal_eval
+from bisect import bisect_left, bisect_right
 import os
+import re
+import marshal
+import zlib
+import itertools
 import getpass
-import shutil
+import stat
+import atexit
+import tempfile
+import threading
+import logging
+import time
+
+# advisory locks for saves, fcntl on Linux/macOS, msvcrt on Windows
+try:
+    import fcntl
+    msvcrt = None
+except ImportError:
+    fcntl = None
+    try:
+        import msvcrt
+    except ImportError:
+        msvcrt = None
 
 
 """
@@ -16,6 +36,10 @@ Program Will add UI elements based on a TXT File
 
 - Use create_options_UI() Function to create the elements
 - Use getAllElements() to get all widgets to create signal connections in main program
+- Use load_options()/SettingsModel to read and save the TXT file without a UI
+
+The widget functions live in Option_Settings_UI and are loaded from there on first use, so parsing and saving
+settings files doesn't import PyQt5
 
 TXT file can accept only this formatting
 
@@ -28,701 +52,2108 @@ TXT file can accept only this formatting
 
 
 
-def getOptions(path: str) -> dict:
-    main_settings_dict = None
+# opt-in instrumentation, reports go to the callback set with set_instrumentation() and/or to this logger at DEBUG
+instrumentation_logger = logging.getLogger("Option_Settings_Auto.instrumentation")
+instrumentation_callback = None
+# report of the create_options_UI()/save_settings()/default_settings() call running on this thread
+active_reports = threading.local()
+
+
+class InstrumentationReport:
+    """
+    Per call report: phase durations in seconds, created widgets/layouts per data type, bytes read/written
+    """
+    __slots__ = ("operation", "phases", "counts", "bytes_read", "bytes_written", "start", "seconds")
+
+    def __init__(self, operation: str):
+        self.operation = operation
+        self.phases = {}
+        self.counts = {}
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.start = time.perf_counter()
+        self.seconds = None
+
+    def add_phase(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def count(self, name: str, number: int = 1):
+        self.counts[name] = self.counts.get(name, 0) + number
+
+    def as_dict(self) -> dict:
+        return {"operation": self.operation, "seconds": self.seconds, "phases": dict(self.phases),
+                "counts": dict(self.counts), "bytes_read": self.bytes_read, "bytes_written": self.bytes_written}
+
+    def __str__(self) -> str:
+        phases = ", ".join(f"{name} {seconds * 1000:.1f} ms" for name, seconds in self.phases.items())
+        counts = ", ".join(f"{name} {number}" for name, number in self.counts.items())
+        total = f"{self.seconds * 1000:.1f} ms" if self.seconds is not None else "-"
+        return (f"{self.operation}: {total} [{phases}] [{counts}] "
+                f"read {self.bytes_read} B, written {self.bytes_written} B")
+
+
+def set_instrumentation(callback=None):
+    """
+    :param callback: called with an InstrumentationReport after every create_options_UI()/save_settings()/
+                     default_settings() call, None turns it off. Enabling DEBUG on the
+                     "Option_Settings_Auto.instrumentation" logger reports too
+    """
+    global instrumentation_callback
+    instrumentation_callback = callback
+
+
+def instrumentation_enabled() -> bool:
+    return instrumentation_callback is not None or instrumentation_logger.isEnabledFor(logging.DEBUG)
+
+
+def active_report() -> Union[InstrumentationReport, None]:
+    return getattr(active_reports, "report", None)
+
+
+def deliver_report(report: InstrumentationReport):
+    if instrumentation_callback is not None:
+        instrumentation_callback(report)
+    if instrumentation_logger.isEnabledFor(logging.DEBUG):
+        instrumentation_logger.debug("%s", report)
+
+
+def instrumented(operation: str):
+    """
+    decorator, makes a report for each call while instrumentation is enabled. Calls made inside an instrumented call
+    add to the outer report
+    """
+    def decorator(function):
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            if active_report() is not None or not instrumentation_enabled():
+                return function(*args, **kwargs)
+
+            report = InstrumentationReport(operation)
+            active_reports.report = report
+            try:
+                return function(*args, **kwargs)
+            finally:
+                active_reports.report = None
+                report.seconds = time.perf_counter() - report.start
+                deliver_report(report)
+
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def timed(report: Union[InstrumentationReport, None], phase: str):
+    # adds the time of the block to phase, does nothing without a report
+    if report is None:
+        yield
+        return
 
-    file_valid = False
-    if os.path.exists(path):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        report.add_phase(phase, time.perf_counter() - start)
+
+
+# precompiled tokens for parse_value()
+INT_PATTERN = re.compile(r"[0-9]+")
+# numbers literal_eval() would return unchanged, converted directly instead
+NUMBER_PATTERN = re.compile(r"[+-]?(?:[0-9]+\.[0-9]*|\.[0-9]+|0|[1-9][0-9]*)")
+# bare words literal_eval() can't turn into a value, lets comma lists of plain strings skip it
+WORD_PATTERN = re.compile(r"(?!(?:True|False|None)$)[A-Za-z_][\w.\- ]*")
+
+
+def valid_options_path(path: str) -> bool:
+    if path and os.path.exists(path):
         file = path.split(".")
         if file[-1][-3:] == "txt":
-            file_valid = True
+            return True
 
-    if file_valid:
-        main_settings = open(path, "r")
-        main_settings_list = main_settings.readlines()
+    return False
 
-        main_settings_list = [x.strip('\n') for x in main_settings_list if x.count('=') == 1]
-        main_settings_dict = {key_value[0].strip(): key_value[1].strip() for key_value in (i.split("=") for i in main_settings_list)}
 
-    return main_settings_dict
+def parse_value(raw: str) -> Union[tuple, str, int, float, list, bool]:
+    """
+    turns the value side of a "name = value" line into its datatype, handles only tuples (items with commas), digits,
+    strings, bools
+    :param raw: value text with surrounding whitespace already stripped
+    """
+    # make a tuple of strings or tuple of integers
+    if "," in raw:
+        final_value = [x.strip() for x in raw.split(",")]
+
+        # () make a tuple
+        if final_value[0][:1] == "(" and final_value[-1][-1:] == ")":
+            final_value[0] = final_value[0].strip("(")
+            final_value[-1] = final_value[-1].strip(")")
+            return tuple(final_value)
+
+        # [[]] make a list with list
+        if final_value[0][:2] == "[[" and final_value[-1][-2:] == "]]":
+            final_value[0] = final_value[0].strip("[[")
+            final_value[-1] = final_value[-1].strip("]]")
+            return [final_value]
+
+        # if all integers turn into list of integers
+        if all(INT_PATTERN.fullmatch(x) for x in final_value):
+            return [int(x) for x in final_value]
+
+        # plain numbers, plain words stay strings, otherwise turn them all to floats/bools
+        if all(NUMBER_PATTERN.fullmatch(x) for x in final_value):
+            return [float(x) if "." in x else int(x) for x in final_value]
+        if any(WORD_PATTERN.fullmatch(x) for x in final_value):
+            return final_value
+        try:
+            return [literal_eval(x) for x in final_value]
+        except (ValueError, SyntaxError, TypeError, MemoryError, RecursionError):
+            return final_value
 
+    # make bool
+    upper = raw.upper()
+    if upper == "TRUE" or upper == "FALSE":
+        return upper == "TRUE"
 
-# change data types in options text file, handles only tuples (items with commas), digits, strings, bools
-def options_affix_datatypes(options_dict: Dict[str, str]) -> Dict[str, Union[tuple, str, int, float, list]]:
-    for key in options_dict:
-        # make a tuple of strings or tuple of integers
-        if "," in options_dict[key]:
-            temp_split = options_dict[key].split(",")
-            final_value = [x.strip() for x in temp_split]
-
-            # () make a tuple
-            if "(" == final_value[0][0] and ")" == final_value[-1][-1]:
-                final_value[0] = final_value[0].strip("(")
-                final_value[-1] = final_value[-1].strip(")")
-                final_value = tuple(x for x in final_value)
-
-            # [[]] make a list with list
-            elif "[[" == final_value[0][0:2] and "]]" == final_value[-1][-2:]:
-                final_value[0] = final_value[0].strip("[[")
-                final_value[-1] = final_value[-1].strip("]]")
-                final_value = [[x for x in final_value]]
-
-            # if all integers turn into list of integers
-            elif all(x.isdigit() for x in final_value):
-                    final_value = [int(x) for x in final_value]
-
-            # turn them all to bools to see if they are all bool
-            else:
-                try:
-                    final_value = [literal_eval(s) for s in final_value]
-                except:
-                    pass
+    # make integer
+    if INT_PATTERN.fullmatch(raw):
+        return int(raw)
 
-            options_dict[key] = final_value
+    # make float
+    try:
+        return float(raw)
+    except ValueError:
+        return raw
 
-        # make bool
-        elif "TRUE" == options_dict[key].upper() or "FALSE" == options_dict[key].upper():
-            options_dict[key] = bool(options_dict[key])
 
-        # make integer
-        elif options_dict[key].isdigit():
-            options_dict[key] = int(options_dict[key])
+def iter_options(path: str):
+    """
+    reads a settings TXT file 1 line at a time, lines without exactly 1 "=" are skipped. Autosaved changes waiting
+    in the file's journal replace the values of their keys, keys only the journal has come last with line number None
+    :param path: path to settings TXT file
+    :return: generator of (key, value with datatype, line number) tuples
+    """
+    records = read_journal(path) if valid_options_path(path) else None
+    if not records:
+        yield from iter_file_options(path)
+        return
 
-        # make float
-        else:
-            try:
-                options_dict[key] = float(options_dict[key])
-            except:
-                pass
+    for key, value, line_number in iter_file_options(path):
+        if key in records:
+            value = parse_value(records.pop(key))
+        yield key, value, line_number
 
-    return options_dict
+    for key, value in records.items():
+        yield key, parse_value(value), None
+
+
+def iter_file_options(path: str):
+    # the file's own lines without its journal, what the parse cache keeps
+    if not valid_options_path(path):
+        return
+
+    with open(path, "r") as file:
+        for line_number, line in enumerate(file, 1):
+            if line.count("=") != 1:
+                continue
+
+            key, _, raw = line.partition("=")
+            yield key.strip(), parse_value(raw.strip()), line_number
 
 
-def getAllElements(widget_layout: [QWidget, QLayout]) -> dict:
+# parsed settings files, (realpath, "raw"/"typed") -> (st_mtime_ns, st_size, dict), least recently used first
+options_cache = OrderedDict()
+options_cache_max_size = 32
+# background saves/loads use the cache from worker threads
+options_cache_lock = threading.Lock()
+
+
+def set_options_cache_size(max_size: int):
     """
-    function that gets all items in a layout recursively and passes into a dict
-    :param element: Qwidget or layout
-    :return:  return as a dict, all layout/widget/layout items object names as keys with the values as the layout/widget/layout item
+    :param max_size: number of parsed files kept by getOptions()/load_options(), 0 turns the cache off
     """
-    element_items = {}
+    global options_cache_max_size
+    options_cache_max_size = max_size
 
-    if isinstance(widget_layout, QWidget):
-        layout = widget_layout.layout()
-    else:
-        layout = widget_layout
+    with options_cache_lock:
+        while len(options_cache) > max(max_size, 0):
+            options_cache.popitem(last=False)
 
-    def traverse_layout(l):
-        try:
-            if l.objectName().strip() == "":
-                element_items[str(hex(id(l)))] = l
-            else:
-                element_items[l.objectName()] = l
-        except:
-            element_items[str(hex(id(l)))] = l
-
-        for i in range(l.count()):
-            item = l.itemAt(i)
-            item_to_check = None
-
-            if item:
-                obj = item.widget()
-                lay = item.layout()
-
-                if obj:
-                    item_to_check = obj
-                elif lay:
-                    item_to_check = lay
-                else:
-                    item_to_check = item
 
-                try:
-                    if item_to_check.objectName().strip() == "":
-                        element_items[str(hex(id(item_to_check)))] = item_to_check
-                    else:
-                        element_items[item_to_check.objectName()] = item_to_check
-                except:
-                    element_items[str(hex(id(item_to_check)))] = item_to_check
+def invalidate_options_cache(path: str = None):
+    """
+    drops the cached parse of path, or of every file if no path is given
+    """
+    if path is None:
+        with options_cache_lock:
+            options_cache.clear()
+        return
 
-            if item_to_check:
-                if isinstance(item_to_check, QLayout):
-                    traverse_layout(item_to_check)
+    # "raw", "typed" and the parses of each schema
+    realpath = os.path.realpath(path)
+    with options_cache_lock:
+        for cache_key in [cache_key for cache_key in options_cache if cache_key[0] == realpath]:
+            del options_cache[cache_key]
 
-                if isinstance(item_to_check, QWidget):
-                    lay = item_to_check.layout()
-                    if lay:
-                        traverse_layout(lay)
 
-    traverse_layout(layout)
+def cached_options(path: str, parse_type: str, parser, sidecar: bool = False) -> Union[dict, None]:
+    # repeat loads of an unchanged file only cost a stat(), a copy is returned so callers can change the dict
+    if options_cache_max_size <= 0 and not sidecar:
+        return parser(path)
 
-    return element_items
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return parser(path)
+
+    cache_key = (os.path.realpath(path), parse_type)
+    with options_cache_lock:
+        cached = options_cache.get(cache_key)
+        if cached and cached[0] == file_stat.st_mtime_ns and cached[1] == file_stat.st_size:
+            options_cache.move_to_end(cache_key)
+            report = active_report()
+            if report is not None:
+                report.count("cache hits")
+            return dict(cached[2])
+
+    result = sidecar_options(path, parse_type, file_stat) if sidecar else parser(path)
+    if result is not None and options_cache_max_size > 0:
+        with options_cache_lock:
+            options_cache[cache_key] = (file_stat.st_mtime_ns, file_stat.st_size, result)
+            options_cache.move_to_end(cache_key)
+            while len(options_cache) > options_cache_max_size:
+                options_cache.popitem(last=False)
+        result = dict(result)
+
+    return result
+
+
+def read_typed_options(path: str) -> Union[dict, None]:
+    if not valid_options_path(path):
+        return None
+
+    report = active_report()
+    if report is None:
+        return {key: value for key, value, line_number in iter_file_options(path)}
+
+    # instrumented, file reading and type inference get timed apart
+    with timed(report, "read"):
+        raw = read_raw_options(path)
+    with timed(report, "parse"):
+        return {key: parse_value(value) for key, value in raw.items()}
+
+
+def read_raw_options(path: str) -> Union[dict, None]:
+    main_settings_dict = None
+
+    if valid_options_path(path):
+        with open(path, "r") as main_settings:
+            report = active_report()
+            if report is not None:
+                report.bytes_read += os.fstat(main_settings.fileno()).st_size
+
+            main_settings_dict = {}
+            for line in main_settings:
+                if line.count("=") == 1:
+                    key, _, value = line.partition("=")
+                    main_settings_dict[key.strip()] = value.strip()
 
+    return main_settings_dict
 
-def create_options_UI(user_path: str = None, columns: int = 0, inner_key_font: QFont() = None,
-                      inner_format: dict = None, outer_format: dict = None, save_default_buttons: bool = False, default_path: str = None):
 
+def load_options(path: str, sidecar: bool = False,
+                 schema: "SettingsSchema" = None) -> Union[Dict[str, Union[tuple, str, int, float, list]], None]:
+    """
+    :param sidecar: read the parse from the binary sidecar next to the file (written on the first load), so later
+                    runs skip text parsing while the file is unchanged, see sidecar_options()
+    :param schema: SettingsSchema, values get the datatype it declares instead of a guessed one
+    :return: dict of key: value with datatype for a settings TXT file, None if the path isn't a valid TXT file.
+             Parses are cached per file until it changes on disk, the list/tuple values are shared with the cache
+             so replace them instead of changing them in place
     """
-    This program mainly for creating easy to add options settings in any program you want to have user defined settings
+    if is_sqlite_path(path):
+        options = sqlite_options(path, typed=schema is None)
+        if options is None or schema is None:
+            return options
+        return {key: schema.convert(key, value) for key, value in options.items()}
+
+    if schema is not None:
+        return replay_journal(path, cached_options(path, schema.parse_type, schema.read_options), schema=schema)
+
+    return replay_journal(path, cached_options(path, "typed", read_typed_options, sidecar=sidecar), typed=True)
 
-    :param user_path:  ------- Path to user settings TXT file
 
-    :param columns: -------- Number of columns you want elements to be separated into so all the widgets
-                    aren't all in 1 big list on the UI
+def getOptions(path: str, sidecar: bool = False) -> dict:
+    if is_sqlite_path(path):
+        return sqlite_options(path, typed=False)
 
-    :param inner_key_font: --------Qfont() for labels for the widgets
+    return replay_journal(path, cached_options(path, "raw", read_raw_options, sidecar=sidecar), typed=False)
 
-    :param inner_format: -------- For formatting inner element layouts by datatype, takes the form of:
-                        {str: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": stretch}}
-                        spacing = provides spacing between elements must be an integer value
-                        label_alignment = must be a Qt.Alignment flag to give label alignment
-                        widget_alignment = must be a Qt.Alignment flag to give widget alignment
-                        front_end_stretch / backend_stretch = only accepts "stretch" for value if you want to .addstretch() to layout
 
-    :param outer_format: ------- For formatting outer element layouts, takes the form of:
-                        {"front_end_stretch": None, "spacing": None,  "backend_stretch": "stretch"}
-                        if you want to addstretch() to layout, put in "stretch", if you want spacing to front or end
-                        of layout add integer value.
-                        NOTE: At this time can't put spacing between elements of the layout
+def settings_exist(path: str) -> bool:
+    # TXT file on disk, or a profile with at least 1 key in its database
+    if is_sqlite_path(path):
+        database, profile = split_sqlite_path(path)
+        return os.path.exists(database) and settings_database(database).exists(profile)
 
-    :param save_default_buttons: -------- Adds Save/Reset Default buttons
+    return os.path.exists(path)
 
-    :param default_path:  ------- Path to default settings TXT file
 
-    :return: QWidget
+# sidecar = <settings file>.cache, marshal of (magic, version, marshal format, st_mtime_ns, st_size, parses) where
+# parses is {"raw"/"typed": (crc32, marshal bytes of that dict)}, so a load only unmarshals the parse it needs and
+# a corrupted parse that would still unmarshal is caught by its checksum
+SIDECAR_SUFFIX = ".cache"
+SIDECAR_MAGIC = "Option_Settings_Auto sidecar"
+SIDECAR_VERSION = 2
+
+
+def sidecar_path(path: str) -> str:
+    return path + SIDECAR_SUFFIX
+
+
+def sidecar_options(path: str, parse_type: str, file_stat: os.stat_result) -> Union[dict, None]:
     """
+    :param parse_type: "raw" (getOptions()) or "typed" (load_options())
+    :param file_stat: os.stat() of path the sidecar has to match
+    :return: options of path from its sidecar, both parses are made and the sidecar rewritten first if it is
+             missing, stale or can't be read
+    """
+    if not valid_options_path(path):
+        return None
 
-    # read given txt file to extract options
-    main_settings_dict = None
-    if user_path:
+    options = read_sidecar(path, parse_type, file_stat)
+    report = active_report()
+    if options is not None:
+        if report is not None:
+            report.count("sidecar hits")
+        return options
+
+    raw = read_raw_options(path)
+    parses = {"raw": raw, "typed": {key: parse_value(value) for key, value in raw.items()}}
+    write_sidecar(path, file_stat, parses)
+    if report is not None:
+        report.count("sidecar rebuilds")
+
+    return parses[parse_type]
 
-        main_settings_dict = getOptions(user_path)
-    elif default_path:
-        main_settings_dict = getOptions(default_path)
 
-    # return data types from the txt file
+def read_sidecar(path: str, parse_type: str, file_stat: os.stat_result) -> Union[dict, None]:
+    # bulk read + marshal.loads(), None for anything that isn't a current sidecar of this exact file
     try:
-        options = options_affix_datatypes(main_settings_dict)
-    except:
-        print("ERROR NO VALID PATHS PASSED")
+        with open(sidecar_path(path), "rb") as file:
+            data = file.read()
+    except OSError:
+        return None
 
-    # changes inner format if user passes in new values
-    inner_format = inner_element_format(inner_format)
+    try:
+        magic, version, marshal_version, mtime_ns, size, parses = marshal.loads(data)
+        if (magic, version, marshal_version) != (SIDECAR_MAGIC, SIDECAR_VERSION, marshal.version):
+            return None
+        if (mtime_ns, size) != (file_stat.st_mtime_ns, file_stat.st_size):
+            return None
+        checksum, parse = parses[parse_type]
+        if zlib.crc32(parse) != checksum:
+            return None
+        options = marshal.loads(parse)
+    except Exception:
+        # a corrupt sidecar can fail to unmarshal in many ways, MemoryError for a garbled length among them
+        return None
+
+    if not isinstance(options, dict):
+        return None
+
+    report = active_report()
+    if report is not None:
+        report.bytes_read += len(data)
+
+    return options
+
+
+def write_sidecar(path: str, file_stat: os.stat_result, parses: dict):
+    # replaced atomically like the settings files, a sidecar that can't be written (read only directory) is skipped
+    parses = {parse_type: marshal.dumps(options) for parse_type, options in parses.items()}
+    parses = {parse_type: (zlib.crc32(parse), parse) for parse_type, parse in parses.items()}
+    data = marshal.dumps((SIDECAR_MAGIC, SIDECAR_VERSION, marshal.version, file_stat.st_mtime_ns, file_stat.st_size,
+                          parses))
+    target = sidecar_path(path)
+
+    try:
+        fd, temp_path = tempfile.mkstemp(prefix="." + os.path.basename(target) + ".", suffix=".tmp",
+                                         dir=os.path.dirname(os.path.abspath(target)))
+    except OSError:
+        return
 
-    # change outer format if user passes in new values
-    outer_format = outer_element_format(outer_format)
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(data)
+        # mkstemp creates the file as 0600, everyone who can read the settings file has to be able to read its
+        # sidecar or they would rebuild it on every load
+        os.chmod(temp_path, stat.S_IMODE(file_stat.st_mode))
+        os.replace(temp_path, target)
+    except OSError:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        return
 
-    # turns all options into UI elements based on datatypes
-    total_elements = []
-    for key, value in options.items():
+    report = active_report()
+    if report is not None:
+        report.bytes_written += len(data)
 
-        element = return_UI_element(key, value, key_font=inner_key_font, inner_format=inner_format)
-        if element:
-            total_elements.append(element)
 
-    # divide elements into columns if user doesn't want all UI elements in a big long vertical list
-    divided = divide_elements(total_elements, columns)
+# change data types in options text file, handles only tuples (items with commas), digits, strings, bools
+def options_affix_datatypes(options_dict: Dict[str, str]) -> Dict[str, Union[tuple, str, int, float, list]]:
+    for key in options_dict:
+        options_dict[key] = parse_value(options_dict[key])
+
+    return options_dict
+
+
+def format_value(value: [tuple, str, int, float, list]) -> str:
+    """
+    turns a value returned by options_affix_datatypes() back into its TXT file form
+    """
+    if type(value) == tuple:
+        return "(" + ", ".join(str(x) for x in value) + ")"
 
-    # widget to be passed to window
-    upper_widget = QWidget()
+    if type(value) == list:
+        if value and type(value[0]) == list:
+            return "[[" + ", ".join(str(x) for x in value[0]) + "]]"
+        return ", ".join(str(x) for x in value)
 
-    save_layout = None
-    if save_default_buttons and default_path:
-        save_layout = create_default_buttons(default_path=default_path, user_path=user_path, option_items_upper_widget=upper_widget)
+    return str(value)
 
-    # if more than 1 column of elements to split
-    if len(divided) >= 2:
-        upper_vert_layout = QVBoxLayout()
-        
-        column_elements = []
-        for i in divided:
-            # vertical line for separation between each "column" of elements
-            frame = QFrame()
-            frame.setFrameShape(QFrame.VLine)
-            frame.setFrameShadow(QFrame.Sunken)
 
-            VLayout = build_outer_element(i, outer_format=outer_format, layout=QVBoxLayout())
-            column_elements.append(VLayout)
+def same_value_type(current, value) -> bool:
+    # ints can go where floats are, otherwise the datatype of a key can't change
+    if type(current) == float and type(value) == int:
+        return True
+    return type(current) == type(value)
 
-            # don't add qframe to end
-            if divided.index(i)+1 != len(divided):
-                column_elements.append(frame)
 
-        layout = build_outer_element(column_elements, outer_format=outer_format, layout=QHBoxLayout())
+# spin box limits for keys without a schema field
+DEFAULT_LIMITS = {"minimum": 0, "maximum": 10000000, "item maximum": 100000, "decimals": 2}
+SCHEMA_TYPES = ("int", "float", "str", "bool", "int list", "float list", "str list", "radio", "combo")
 
-        upper_vert_layout.addLayout(layout)
-        if save_layout:
-            upper_vert_layout.addLayout(save_layout)
 
-        upper_widget.setLayout(upper_vert_layout)
+def parse_bool(raw: str) -> bool:
+    upper = raw.upper()
+    if upper != "TRUE" and upper != "FALSE":
+        raise ValueError(f"not TRUE/FALSE: {raw!r}")
+    return upper == "TRUE"
 
-    # if only 1 column
-    if len(divided) <= 1:
 
-        upper_layout = build_outer_element(divided[0], outer_format=outer_format, layout=QVBoxLayout())
-        if save_layout:
-            upper_layout.addLayout(save_layout)
+def parse_str_list(raw: str) -> list:
+    return [x.strip() for x in raw.split(",")]
 
-        upper_widget.setLayout(upper_layout)
 
-    return upper_widget
+def parse_int_list(raw: str) -> list:
+    return [int(x) for x in raw.split(",")]
 
 
-def create_layout(*args, layout: QLayout) -> QLayout:
+def parse_float_list(raw: str) -> list:
+    return [float(x) for x in raw.split(",")]
+
+
+# value text -> value for each schema type, ValueError if the text doesn't fit
+SCHEMA_PARSERS = {"int": int, "float": float, "str": str, "bool": parse_bool, "int list": parse_int_list,
+                  "float list": parse_float_list, "str list": parse_str_list, "radio": parse_value,
+                  "combo": parse_value}
+
+
+# tells apart the parse cache entries of different schemas
+schema_ids = itertools.count()
+
+
+class SchemaField:
+    """
+    what the schema declares for 1 key, see SettingsSchema
+    """
+    __slots__ = ("key", "type", "minimum", "maximum", "decimals", "choices", "parser")
+
+    def __init__(self, key: str, type: str, minimum: float = None, maximum: float = None, decimals: int = None,
+                 choices: list = None):
+        if type not in SCHEMA_TYPES:
+            raise ValueError(f"{key}: unknown schema type {type!r}, expected one of {SCHEMA_TYPES}")
+
+        self.key = key
+        self.type = type
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decimals = decimals
+        self.choices = choices
+        self.parser = SCHEMA_PARSERS[type]
+
+    def limits(self, item: bool = False) -> tuple:
+        """
+        :param item: limits of a list item, list keys without a maximum get the smaller default
+        :return: (minimum, maximum, decimals) for the key's spin boxes
+        """
+        maximum = DEFAULT_LIMITS["item maximum" if item else "maximum"]
+        return (DEFAULT_LIMITS["minimum"] if self.minimum is None else self.minimum,
+                maximum if self.maximum is None else self.maximum,
+                DEFAULT_LIMITS["decimals"] if self.decimals is None else self.decimals)
+
+    def check(self, value) -> Union["SchemaViolation", None]:
+        kind = self.type
+
+        if kind.endswith(" list"):
+            if type(value) != list:
+                return SchemaViolation(self.key, "type", value, kind)
+            for item in value:
+                violation = self.check_item(item, kind[:-5])
+                if violation is not None:
+                    return violation
+            return None
+
+        if kind == "radio":
+            if type(value) != tuple:
+                return SchemaViolation(self.key, "type", value, kind)
+            checked = [item for item, marker in zip(value, value[1:]) if marker.upper() == "TRUE"]
+            if self.choices is not None and (choice_items(value) != self.choices or not checked):
+                return SchemaViolation(self.key, "choice", value, self.choices)
+            return None
+
+        if kind == "combo":
+            if type(value) != list or not value or type(value[0]) != list:
+                return SchemaViolation(self.key, "type", value, kind)
+            items, index = value[0][:-1], value[0][-1]
+            if self.choices is not None and items != self.choices:
+                return SchemaViolation(self.key, "choice", value, self.choices)
+            if not index.isdigit() or int(index) >= len(items):
+                return SchemaViolation(self.key, "choice", value, f"index below {len(items)}")
+            return None
+
+        return self.check_item(value, kind)
+
+    def check_item(self, value, kind: str) -> Union["SchemaViolation", None]:
+        # ints are valid floats, bools aren't valid ints
+        if kind == "float" and type(value) == int:
+            value = float(value)
+        if type(value).__name__ != kind:
+            return SchemaViolation(self.key, "type", value, kind)
+
+        if kind == "str" or kind == "bool":
+            if self.choices is not None and value not in self.choices:
+                return SchemaViolation(self.key, "choice", value, self.choices)
+            return None
+
+        if (self.minimum is not None and value < self.minimum) or (self.maximum is not None and value > self.maximum):
+            return SchemaViolation(self.key, "range", value, (self.minimum, self.maximum))
+        if kind == "float" and self.decimals is not None and round(value, self.decimals) != value:
+            return SchemaViolation(self.key, "decimals", value, self.decimals)
+        return None
+
+
+class SchemaViolation:
+    """
+    1 problem found by SettingsSchema.validate()
+    problem: "type", "range", "decimals", "choice", "missing" (key in the schema, not in the settings) or
+    "unknown" (key in the settings, not in the schema), expected: what the schema declares for it
+    """
+    __slots__ = ("key", "problem", "value", "expected")
+
+    def __init__(self, key: str, problem: str, value=None, expected=None):
+        self.key = key
+        self.problem = problem
+        self.value = value
+        self.expected = expected
+
+    def __repr__(self) -> str:
+        return f"SchemaViolation({self.key!r}, {self.problem!r}, value={self.value!r}, expected={self.expected!r})"
+
+    def __str__(self) -> str:
+        return f"{self.key}: {self.problem}, got {self.value!r}, expected {self.expected!r}"
+
+
+class SettingsValidationError(ValueError):
     """
-    :param args:  List of elements to add to the layout.
-                  Supported types: QWidget, Layouts, AlignmentFlags, int (for spacing), "stretch" (add .addStretch()
-                  with no parameters)
-    :param layout:  QHBoxLayout, QVBoxLayout mainly supported, may work for other layouts
-    :return:  Returns Layout with added elements/flags/spacing/stretching
+    settings that break their schema, nothing was written
     """
+    def __init__(self, violations: list):
+        super().__init__("; ".join(str(violation) for violation in violations))
+        self.violations = violations
 
-    for i in args:
-        if isinstance(i, QWidget):
-            layout.addWidget(i)
-        elif isinstance(i, QLayout):
-            layout.addLayout(i)
 
-        # add alignment for previous element
-        elif isinstance(i, Qt.AlignmentFlag):
+class SettingsSchema:
+    """
+    Type, limits and choices of every key of a settings TXT file, read from a schema TXT file with 1 line per key:
+
+        count = int 0 100                  type, then optional minimum, maximum (- for none) and decimals
+        ratio = float 0 1 3
+        sizes = int list 0 1000
+        name = str
+        level = str: low, high             str/bool with the values they may have
+        enabled = bool
+        mode = radio: fast, slow, medium   radio/combo with their choices
+        color = combo: red, green, blue
+
+    Compiled once (load_schema()) into a key -> SchemaField table, load_options(schema=...) then converts every
+    value straight to its declared type instead of guessing it, create_options_UI(schema=...) sets the spin box
+    limits from it and validate() checks a whole settings dict in 1 pass
+    """
+    __slots__ = ("path", "fields", "parse_type")
+
+    def __init__(self, fields: dict, path: str = None):
+        self.path = path
+        self.fields = fields
+        # parse cache entries of loads with this schema, see cached_options()
+        self.parse_type = f"schema {next(schema_ids)}"
+
+    @classmethod
+    def parse(cls, lines, path: str = None) -> "SettingsSchema":
+        fields = {}
+        for line_number, line in enumerate(lines, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+
+            key, equals, declaration = line.partition("=")
+            if not equals:
+                raise ValueError(f"{path or 'schema'} line {line_number}: expected 'key = type ...', got {line!r}")
+            key = key.strip()
+            declaration, colon, choices = declaration.partition(":")
+            words = declaration.split()
+
+            # 2 word types, "int list" ...
+            kind_length = 2 if len(words) >= 2 and words[1] == "list" else 1
+            kind = " ".join(words[:kind_length])
+            numbers = [None if word == "-" else float(word) for word in words[kind_length:]]
+            numbers += [None] * (3 - len(numbers))
+            minimum, maximum, decimals = numbers[:3]
+            if kind.startswith("int"):
+                minimum = None if minimum is None else int(minimum)
+                maximum = None if maximum is None else int(maximum)
+
+            try:
+                fields[key] = SchemaField(key, kind, minimum, maximum,
+                                          None if decimals is None else int(decimals),
+                                          parse_str_list(choices) if colon else None)
+            except ValueError as error:
+                raise ValueError(f"{path or 'schema'} line {line_number}: {error}") from error
+
+        return cls(fields, path=path)
+
+    @classmethod
+    def from_options(cls, options: dict) -> "SettingsSchema":
+        """
+        schema with the datatypes load_options() inferred for options and the default limits, to start one from
+        """
+        fields = {}
+        for key, value in options.items():
+            kind = type(value).__name__
+            choices = None
+            if type(value) == tuple:
+                kind, choices = "radio", choice_items(value)
+            elif type(value) == list and value and type(value[0]) == list:
+                kind, choices = "combo", value[0][:-1]
+            elif type(value) == list:
+                item_types = {type(item) for item in value}
+                if item_types == {int}:
+                    kind = "int list"
+                elif item_types <= {int, float}:
+                    kind = "float list"
+                else:
+                    kind = "str list"
+            fields[key] = SchemaField(key, kind, choices=choices)
+
+        return cls(fields)
+
+    def text(self) -> str:
+        """
+        :return: the schema in its TXT form
+        """
+        lines = []
+        for key, field in self.fields.items():
+            words = [field.type]
+            numbers = [field.minimum, field.maximum, field.decimals]
+            while numbers and numbers[-1] is None:
+                numbers.pop()
+            words += ["-" if number is None else str(number) for number in numbers]
+            line = f"{key} = {' '.join(words)}"
+            if field.choices is not None:
+                line += ": " + ", ".join(str(choice) for choice in field.choices)
+            lines.append(line + "\n")
+        return "".join(lines)
+
+    def convert(self, key: str, raw: str):
+        # declared type, parse_value()'s guess for keys the schema doesn't have or text that doesn't fit the type
+        field = self.fields.get(key)
+        if field is not None:
             try:
-                index = (args.index(i))-1
-                layout.setAlignment(args[index], i)
-            except:
+                return field.parser(raw)
+            except ValueError:
                 pass
+        return parse_value(raw)
+
+    def read_options(self, path: str) -> Union[dict, None]:
+        raw = read_raw_options(path)
+        if raw is None:
+            return None
+
+        fields = self.fields
+        options = {}
+        for key, value in raw.items():
+            field = fields.get(key)
+            if field is None:
+                options[key] = parse_value(value)
+                continue
+            try:
+                options[key] = field.parser(value)
+            except ValueError:
+                options[key] = parse_value(value)
+        return options
+
+    def validate(self, values: dict, complete: bool = False) -> list:
+        """
+        :param values: key: value as returned by load_options()
+        :param complete: values are a whole settings file, report schema keys it lacks and keys the schema lacks
+        :return: SchemaViolation for every broken key, empty if values are valid
+        """
+        fields = self.fields
+        violations = []
+        for key, value in values.items():
+            field = fields.get(key)
+            if field is None:
+                if complete:
+                    violations.append(SchemaViolation(key, "unknown", value))
+                continue
+
+            violation = field.check(value)
+            if violation is not None:
+                violations.append(violation)
+
+        if complete:
+            violations.extend(SchemaViolation(key, "missing", expected=field.type)
+                              for key, field in fields.items() if key not in values)
+        return violations
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.fields
+
+    def __len__(self) -> int:
+        return len(self.fields)
+
+
+# compiled schemas, realpath -> (st_mtime_ns, st_size, SettingsSchema)
+schema_cache = {}
+
+
+def load_schema(path: str) -> SettingsSchema:
+    """
+    :return: SettingsSchema of a schema TXT file, compiled once and reused until the file changes
+    """
+    file_stat = os.stat(path)
+    realpath = os.path.realpath(path)
+    cached = schema_cache.get(realpath)
+    if cached and cached[0] == file_stat.st_mtime_ns and cached[1] == file_stat.st_size:
+        return cached[2]
+
+    with open(path, "r") as file:
+        schema = SettingsSchema.parse(file, path=path)
+    schema_cache[realpath] = (file_stat.st_mtime_ns, file_stat.st_size, schema)
+    return schema
+
+
+class SettingsModel:
+    """
+    Values of a settings TXT file without any widgets, for batch tools and services that don't have a QApplication
+
+    load()/save() use the same TXT grammar as create_options_UI(), save() only rewrites the lines of changed keys.
+    create_options_UI() binds its widgets to a model, widget edits update the model and set() updates the widgets
+    """
+    __slots__ = ("path", "values", "dirty", "listeners", "schema")
+
+    def __init__(self, values: dict = None, path: str = None, schema: SettingsSchema = None):
+        self.path = path
+        self.values = values if values is not None else {}
+        self.dirty = set()
+        self.listeners = []
+        # save() refuses values that break it
+        self.schema = schema
+
+    @classmethod
+    def load(cls, path: str, sidecar: bool = False, schema: SettingsSchema = None) -> "SettingsModel":
+        values = load_options(path, sidecar=sidecar, schema=schema)
+        if values is None:
+            raise FileNotFoundError(f"not a valid settings TXT file: {path}")
+
+        return cls(values, path=path, schema=schema)
+
+    def validate(self, keys=None) -> list:
+        """
+        :return: SchemaViolation for each of keys (all if None) that breaks the schema, empty without one
+        """
+        if self.schema is None:
+            return []
+        if keys is None:
+            return self.schema.validate(self.values)
+        return self.schema.validate({key: self.values[key] for key in keys if key in self.values})
+
+    def get(self, key: str, default=None, value_type: type = None):
+        """
+        :param value_type: raise TypeError if the value isn't of this datatype
+        """
+        value = self.values.get(key, default)
+        if value_type is not None and key in self.values and not isinstance(value, value_type):
+            raise TypeError(f"{key} is {type(value).__name__}, not {value_type.__name__}")
+
+        return value
+
+    def set(self, key: str, value):
+        """
+        :param value: value with datatype as returned by options_affix_datatypes(), must keep the key's datatype
+        """
+        if key in self.values:
+            current = self.values[key]
+            if not same_value_type(current, value):
+                raise TypeError(f"{key} is {type(current).__name__}, can't set it to {type(value).__name__}")
+            if type(current) == float:
+                value = float(value)
+            if current == value:
+                return
+
+        self.values[key] = value
+        self.dirty.add(key)
+
+        for listener in self.listeners:
+            listener(key, value)
+
+    def text(self, key: str) -> str:
+        return format_value(self.values[key])
+
+    def bind(self, listener):
+        """
+        :param listener: called with (key, value) whenever set() changes a value
+        """
+        self.listeners.append(listener)
+
+    def save(self, path: str = None):
+        """
+        writes the changed keys to path (the loaded file by default), every key if path is another file
+        """
+        path = path or self.path
+
+        if path != self.path or not settings_exist(path):
+            keys = self.values
+        else:
+            keys = self.dirty
 
-        elif type(i) == int:
-            layout.addSpacing(i)
-        elif type(i) == str:
-            if i.upper() == "STRETCH":
-                layout.addStretch()
+        violations = self.validate(keys)
+        if violations:
+            raise SettingsValidationError(violations)
 
-    return layout
+        updates = {key: format_value(self.values[key]) for key in keys if key in self.values}
+        if is_sqlite_path(path):
+            write_settings_updates(path, updates)
+        else:
+            with settings_file_lock(path):
+                if os.path.exists(path):
+                    patch_settings_file(path, updates)
+                else:
+                    atomic_write(path, "".join(f'{key} = {value}\n' for key, value in updates.items()))
+
+        if path == self.path:
+            self.dirty.clear()
+
+    def keys(self):
+        return self.values.keys()
 
+    def items(self):
+        return self.values.items()
 
-def return_UI_element(key: str, value: [tuple, str, int, float, list], key_font: QFont()=None,
-                      inner_format: dict=None) -> Union[QWidget, QLayout, None]:
-    element = None
+    def __getitem__(self, key: str):
+        return self.values[key]
 
-    if type(value) == str:
-        label = create_element_label(key, key_font, inner_format[str]["label_alignment"])
+    def __setitem__(self, key: str, value):
+        self.set(key, value)
 
-        line = QLineEdit()
-        line.setText(value)
-        line.setObjectName(key + "_edit")
+    def __contains__(self, key: str) -> bool:
+        return key in self.values
 
-        element = build_inner_element(data_type=str, inner_format=inner_format, label=label, widget=line, layout=QHBoxLayout())
+    def __len__(self) -> int:
+        return len(self.values)
 
-    elif type(value) == int:
-        label = create_element_label(key, key_font, inner_format[int]["label_alignment"])
 
-        spin = QSpinBox()
-        spin.setMinimum(0)
-        spin.setMaximum(10000000)
-        spin.setValue(value)
-        spin.setObjectName(key + "_spin")
+class OverrideChainMap(ChainMap):
+    # first map is the user layer, a write only keeps the key there while it differs from the layers below
+    def __setitem__(self, key: str, value):
+        lower = self.parents
+        if key in lower and type(lower[key]) == type(value) and lower[key] == value:
+            self.maps[0].pop(key, None)
+        else:
+            self.maps[0][key] = value
+
+
+class LayeredSettingsModel(SettingsModel):
+    """
+    SettingsModel over several settings TXT files, e.g. site defaults -> default file -> user overrides
 
-        element = build_inner_element(data_type=int, inner_format=inner_format, label=label, widget=spin, layout=QHBoxLayout())
+    A key resolves to the value of the highest layer that has it, looked up per key (ChainMap), nothing is merged
+    up front. Only the last layer (the user file, path) is ever written, and it only keeps the keys that differ
+    from the layers below, so changed defaults reach every user that didn't override them
+    """
+    __slots__ = ("paths",)
+
+    def __init__(self, layers: list = None, paths: list = None, schema: SettingsSchema = None):
+        """
+        :param layers: dicts as returned by load_options(), lowest first, the last one holds the user overrides
+        :param paths: TXT file of each layer
+        :param schema: SettingsSchema save() validates against
+        """
+        layers = layers or [{}]
+        super().__init__(OverrideChainMap(*reversed(layers)), path=paths[-1] if paths else None, schema=schema)
+        self.paths = list(paths or [])
+
+    @classmethod
+    def load(cls, sources: list, sidecar: bool = False, schema: SettingsSchema = None) -> "LayeredSettingsModel":
+        """
+        :param sources: settings TXT files lowest first, files that don't exist yet are empty layers
+        :param schema: SettingsSchema, every layer's values get the datatype it declares
+        """
+        layers = read_layers(sources, sidecar=sidecar, schema=schema)
+        if not any(layers[:-1]) and not settings_exist(sources[-1]):
+            raise FileNotFoundError(f"none of the settings TXT files exist: {sources}")
+
+        return cls(layers, paths=sources, schema=schema)
+
+    @property
+    def overrides(self) -> dict:
+        return self.values.maps[0]
+
+    @property
+    def lower(self) -> ChainMap:
+        # merged view without the user layer, what a reset goes back to
+        return self.values.parents
+
+    def source(self, key: str) -> Union[str, None]:
+        """
+        :return: path of the layer key's value comes from
+        """
+        for path, layer in zip(reversed(self.paths), self.values.maps):
+            if key in layer:
+                return path
+        return None
+
+    def override_updates(self, keys) -> Dict[str, Union[str, None]]:
+        """
+        :return: key: text for keys overridden in the user layer, key: None for keys whose line should go
+        """
+        overrides = self.overrides
+        return {key: format_value(overrides[key]) if key in overrides else None for key in keys}
+
+    def reset(self, keys=None):
+        """
+        drops the user overrides of keys (all if None), they show the value of the layers below again
+        """
+        overrides = self.overrides
+        for key in list(overrides) if keys is None else keys:
+            if key not in overrides:
+                continue
+            del overrides[key]
+            self.dirty.add(key)
+
+            if key in self.values:
+                for listener in self.listeners:
+                    listener(key, self.values[key])
+
+    def compact(self) -> list:
+        """
+        drops overrides that equal the layers below (a full copy of the default file as older versions saved it),
+        the next save() removes their lines
+        :return: dropped keys
+        """
+        lower = self.lower
+        overrides = self.overrides
+        keys = [key for key, value in overrides.items()
+                if key in lower and type(lower[key]) == type(value) and lower[key] == value]
+        for key in keys:
+            del overrides[key]
+        self.dirty.update(keys)
+        return keys
+
+    def replace_layers(self, layers: list):
+        """
+        swaps in freshly read layers, unsaved changes stay on top of them
+        """
+        overrides = dict(layers[-1])
+        for key in self.dirty:
+            if key in self.overrides:
+                overrides[key] = self.overrides[key]
+            else:
+                overrides.pop(key, None)
 
-    elif type(value) == float:
-        label = create_element_label(key, key_font, inner_format[float]["label_alignment"])
+        self.values.maps[:] = [overrides] + list(reversed(layers[:-1]))
 
-        spin = QDoubleSpinBox()
-        spin.setDecimals(2)
-        spin.setMinimum(0)
-        spin.setMaximum(10000000)
-        spin.setValue(value)
-        spin.setObjectName(key + "_spin")
+    def save(self, path: str = None):
+        """
+        writes the changed overrides to the user file, any other path gets the whole merged view
+        """
+        path = path or self.path
+        if path != self.path:
+            return super().save(path)
 
-        element = build_inner_element(data_type=float, inner_format=inner_format, label=label, widget=spin, layout=QHBoxLayout())
+        violations = self.validate(self.dirty)
+        if violations:
+            raise SettingsValidationError(violations)
 
-    elif type(value) == bool:
-        check = QCheckBox(key)
-        check.setObjectName(key + "_check")
-        if value == True:
-            check.setCheckState(Qt.Checked)
+        updates = self.override_updates(self.dirty)
+        if is_sqlite_path(path):
+            write_settings_updates(path, updates)
         else:
-            check.setCheckState(Qt.Unchecked)
-
-        element = build_inner_element(data_type=bool, inner_format=inner_format, widget=check, layout=QHBoxLayout())
-
-    elif type(value) == list:
-        if type(value[0]) != list:
-            label = create_element_label(key, key_font, inner_format[list]["label_alignment"])
-
-            total = []
-            for i in value:
-                if type(i) == int:
-                    spin = QSpinBox()
-                    spin.setMinimum(0)
-                    spin.setMaximum(100000)
-                    spin.setValue(i)
-                    spin.setObjectName(key + str(value.index(i)) + "_spin")
-                    total.append(spin)
-
-                elif type(i) == float:
-                    spin = QDoubleSpinBox()
-                    spin.setMinimum(0)
-                    spin.setMaximum(100000)
-                    spin.setDecimals(2)
-                    spin.setValue(i)
-                    spin.setObjectName(key + str(value.index(i)) + "_spin")
-                    total.append(spin)
-
-                elif type(i) == str:
-                    line = QLineEdit()
-                    line.setText(i)
-                    line.setObjectName(key + str(value.index(i)) + "_edit")
-                    total.append(line)
-
-            if len(total) != 0:
-                element = build_inner_element(data_type=list, inner_format=inner_format, label=label, widget=total, layout=QHBoxLayout())
+            with settings_file_lock(path):
+                if os.path.exists(path):
+                    patch_settings_file(path, updates)
+                else:
+                    atomic_write(path, "".join(f'{key} = {value}\n' for key, value in updates.items()
+                                               if value is not None))
+
+        self.dirty.clear()
 
+
+def read_layers(sources: list, sidecar: bool = False, schema: SettingsSchema = None) -> list:
+    # parsed layer per source, {} for files that don't exist (yet)
+    return [(load_options(path, sidecar=sidecar, schema=schema) if settings_exist(path) else None) or {}
+            for path in sources]
+
+
+class SettingsProfiles:
+    """
+    Named settings TXT files (profiles, e.g. "night shift" and "maintenance") parsed once, a SettingsModel each.
+    switch_profile() moves a create_options_UI() panel to another profile by setting only the keys whose values
+    differ, nothing is read or written
+
+    Profiles with the keys of the first one added (all saved from the same default file) share its parsed values,
+    each only keeps the values it differs in on top of them (OverrideChainMap), so a profile costs memory per
+    differing key and diff() between 2 of them only compares those. Other profiles keep all their values
+
+    Edits only change the profile they were made in, save() writes the active profile's file
+    """
+    def __init__(self):
+        # parsed values of the first profile, shared by the profiles with the same keys
+        self.base = None
+        self.models = {}
+        self.active = None
+
+    @classmethod
+    def load(cls, paths: dict, sidecar: bool = False, schema: SettingsSchema = None) -> "SettingsProfiles":
+        """
+        :param paths: profile name: settings TXT file (or sqlite: path), the first profile is the active one
+        """
+        profiles = cls()
+        for name, path in paths.items():
+            profiles.add(name, path, sidecar=sidecar, schema=schema)
+
+        return profiles
+
+    def add(self, name: str, path: str, values: dict = None, sidecar: bool = False,
+            schema: SettingsSchema = None) -> SettingsModel:
+        """
+        :param values: parsed values of path if they are loaded already
+        """
+        if values is None:
+            values = load_options(path, sidecar=sidecar, schema=schema)
+            if values is None:
+                raise FileNotFoundError(f"not a valid settings TXT file: {path}")
+
+        if self.base is None:
+            self.base = values
+        base = self.base
+
+        # same keys in the same order
+        if len(values) == len(base) and all(key == base_key for key, base_key in zip(values, base)):
+            overrides = {key: value for key, value in values.items()
+                         if type(base[key]) != type(value) or base[key] != value}
+            values = OverrideChainMap(overrides, base)
+
+        model = SettingsModel(values, path=path, schema=schema)
+        self.models[name] = model
+        if self.active is None:
+            self.active = name
+
+        return model
+
+    def remove(self, name: str) -> SettingsModel:
+        if name == self.active:
+            raise ValueError(f"{name} is the active profile")
+        return self.models.pop(name)
+
+    def model(self, name: str = None) -> SettingsModel:
+        """
+        :return: model of profile name, the active profile's if None
+        """
+        return self.models[self.active if name is None else name]
+
+    def shares_base(self, name: str) -> bool:
+        values = self.models[name].values
+        return isinstance(values, OverrideChainMap) and values.maps[-1] is self.base
+
+    def diff(self, name: str, other: str) -> tuple:
+        """
+        :return: ({key: value in other} for keys whose value differs, keys only in name, keys only in other)
+        """
+        values = self.models[name].values
+        other_values = self.models[other].values
+
+        if self.shares_base(name) and self.shares_base(other):
+            # keys that neither overrides are the base's value in both
+            keys = list(dict.fromkeys(itertools.chain(values.maps[0], other_values.maps[0])))
+        else:
+            keys = list(values) + [key for key in other_values if key not in values]
+
+        removed = [key for key in keys if key not in other_values]
+        added = [key for key in keys if key not in values]
+
+        changed = {}
+        for key in keys:
+            if key not in values or key not in other_values:
+                continue
+            value = values[key]
+            other_value = other_values[key]
+            if type(value) != type(other_value) or value != other_value:
+                changed[key] = other_value
+
+        return changed, removed, added
+
+    def activate(self, name: str) -> SettingsModel:
+        """
+        makes name the active profile, switch_profile() does it for a panel
+        """
+        model = self.models[name]
+        self.active = name
+        return model
+
+    def dirty(self) -> dict:
+        """
+        :return: profile name: unsaved keys, for the profiles that have any
+        """
+        return {name: set(model.dirty) for name, model in self.models.items() if model.dirty}
+
+    def save(self, name: str = None):
+        """
+        writes the changed keys of profile name (the active profile if None) to its file
+        """
+        self.model(name).save()
+
+    @property
+    def names(self) -> list:
+        return list(self.models)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.models
+
+    def __len__(self) -> int:
+        return len(self.models)
+
+
+class KeyIndex:
+    """
+    Case-insensitive prefix/substring lookup over settings keys, built once so a search doesn't casefold every key.
+    Substring search runs str.find() over all keys joined into 1 string, a query containing the previous query
+    only checks the previous matches again
+    """
+    __slots__ = ("keys", "folded", "text", "starts", "sorted_folded", "sorted_positions", "last_query", "last_matches")
+
+    def __init__(self, keys):
+        self.keys = list(keys)
+        self.folded = [key.casefold() for key in self.keys]
+
+        # keys can't contain a newline (the file is split on them), so a match never spans 2 keys
+        self.text = "\n".join(self.folded)
+        self.starts = []
+        offset = 0
+        for folded in self.folded:
+            self.starts.append(offset)
+            offset += len(folded) + 1
+
+        order = sorted(range(len(self.folded)), key=self.folded.__getitem__)
+        self.sorted_folded = [self.folded[position] for position in order]
+        self.sorted_positions = order
+
+        self.last_query = None
+        self.last_matches = None
+
+    def prefix(self, query: str) -> list:
+        """
+        :return: keys starting with query, in key order
+        """
+        query = query.casefold()
+        start = bisect_left(self.sorted_folded, query)
+        end = bisect_left(self.sorted_folded, query + "\U0010ffff", start)
+
+        return [self.keys[position] for position in sorted(self.sorted_positions[start:end])]
+
+    def search(self, query: str) -> list:
+        """
+        :return: keys containing query, in key order
+        """
+        query = query.casefold()
+        if not query:
+            return list(self.keys)
+        if "\n" in query:
+            return []
+
+        if self.last_query and self.last_query in query:
+            folded = self.folded
+            positions = [position for position in self.last_matches if query in folded[position]]
         else:
-            if type(value[0]) == list:
-                combo = QComboBox()
-                # items except last one, which will be the active index
-                items = value[0][:-1]
-                combo.addItems(items)
+            positions = []
+            text = self.text
+            starts = self.starts
+            index = text.find(query)
+            while index != -1:
+                position = bisect_right(starts, index) - 1
+                positions.append(position)
+                # next key, a key only counts once
+                if position + 1 >= len(starts):
+                    break
+                if len(positions) > len(starts) // 8:
+                    # a query most keys contain, checking the rest 1 by 1 is cheaper than finding every match
+                    folded = self.folded
+                    positions += [position for position in range(position + 1, len(folded))
+                                  if query in folded[position]]
+                    break
+                index = text.find(query, starts[position + 1])
+
+        self.last_query = query
+        self.last_matches = positions
+        return [self.keys[position] for position in positions]
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+
+def patch_settings_lines(lines: list, updates: Dict[str, Union[str, None]]) -> list:
+    """
+    :param lines: lines of a settings TXT file
+    :param updates: key: value text to write, key: None removes the key's line
+    :return: lines with only the lines of the updated keys replaced, comments, ordering and lines without "=" are
+             kept, keys that aren't in the file yet are added to the end
+    """
+    remaining = dict(updates)
+    patched = []
 
-                if value[0][-1].isdigit:
-                    combo.setCurrentIndex(int(value[0][-1]))
+    for line in lines:
+        if line.count("=") == 1:
+            key = line.partition("=")[0].strip()
+            if key in updates:
+                if updates[key] is not None:
+                    patched.append(f'{key} = {updates[key]}\n')
+                remaining.pop(key, None)
+                continue
 
-                combo.setObjectName(key + "_combo")
+        patched.append(line)
 
-                # reuse bool data type argument for this one
-                element = build_inner_element(data_type=bool, inner_format=inner_format, widget=combo, layout=QHBoxLayout())
+    if patched and not patched[-1].endswith("\n"):
+        patched[-1] += "\n"
 
-    elif type(value) == tuple:
-        group = QGroupBox(key)
-        group.setObjectName(key + "_group")
+    for key, value in remaining.items():
+        if value is not None:
+            patched.append(f'{key} = {value}\n')
 
-        radio_buttons = []
-        check_index = 0
-        for i in value:
-            if i.upper() == "TRUE":
-                check_index = value.index(i)-1
-            else:
-                radio = QRadioButton(i)
-                radio.setObjectName(key + str(value.index(i)) + "_radio")
-                radio_buttons.append(radio)
+    return patched
+
+
+# when saved settings files are fsynced: "never", "on-save" (before every replace) or "on-exit" (once at exit)
+FSYNC_POLICIES = ("never", "on-save", "on-exit")
+fsync_policy = "never"
+unsynced_paths = set()
+
+
+def set_fsync_policy(policy: str):
+    """
+    :param policy: "never" leaves flushing to the OS, "on-save" fsyncs the file and its directory before a save
+                   returns, "on-exit" fsyncs every file saved during the run once when the program exits
+    """
+    global fsync_policy
+    if policy not in FSYNC_POLICIES:
+        raise ValueError(f"fsync policy must be one of {FSYNC_POLICIES}, got {policy!r}")
 
-        radio_buttons[check_index].setChecked(True)
+    fsync_policy = policy
 
-        if len(radio_buttons) != 0:
-            group_layout = build_inner_element(data_type=tuple, inner_format=inner_format, widget=radio_buttons, layout=QVBoxLayout())
-            group.setLayout(group_layout)
 
-        element = group
+def fsync_path(path: str):
+    # file, then its directory so the rename itself is durable
+    try:
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    except OSError:
+        # directories can't be opened/fsynced on every platform
+        pass
 
-    return element
 
+@atexit.register
+def fsync_unsynced_paths():
+    while unsynced_paths:
+        fsync_path(unsynced_paths.pop())
 
-# for building the options to pass into create_layout function
-def build_inner_element(data_type: type, inner_format: dict, label: QLabel=None
-                        , widget: Union[QWidget, list, tuple]=None, layout: QLayout=None) -> QLayout:
 
-    spacing = inner_format[data_type]["spacing"]
-    widget_alignment = inner_format[data_type]["widget_alignment"]
-    front_stretch = inner_format[data_type]["front_end_stretch"]
-    back_stretch = inner_format[data_type]["backend_stretch"]
+def read_umask() -> int:
+    # os.umask() can only be read by setting it, for the whole process
+    umask = os.umask(0o022)
+    os.umask(umask)
+    return umask
 
-    if layout:
-        layout.setObjectName(str(hex(id(layout))))
 
-    if data_type != list and data_type != tuple:
-        element = create_layout(front_stretch, label, spacing, widget, widget_alignment, back_stretch, layout=layout)
-    elif data_type == list or data_type == tuple:
-        element = create_layout(front_stretch, label, spacing, *widget, back_stretch, layout=layout)
+# read once at import, saves run on worker threads and changing the umask there would leak into files other
+# threads create at the same time
+process_umask = read_umask()
 
-    return element
+
+def replaced_file_mode(path: str) -> int:
+    # mode of the file being replaced, or the mode open() gives a new file
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except OSError:
+        return 0o666 & ~process_umask
 
 
-# for building the options to pass into create_layout function
-def build_outer_element(elements: list, outer_format: dict, layout: QLayout=None) -> QLayout:
-    print(outer_format)
+def atomic_write(path: str, text: str):
+    """
+    writes text to a temp file in the same directory and replaces path with it, so readers and crashes only ever
+    see the old or the new file, never a truncated one
+    """
+    report = active_report()
+    if report is not None:
+        report.bytes_written += len(text.encode())
 
-    front_stretch = outer_format["front_end_stretch"]
-    spacing = outer_format["spacing"]
-    back_stretch = outer_format["backend_stretch"]
+    with atomic_file(path) as file:
+        file.write(text)
 
-    if layout:
-        layout.setObjectName(str(hex(id(layout))))
 
-    element = create_layout(front_stretch, spacing, *elements, spacing, back_stretch, layout=layout)
+@contextmanager
+def atomic_file(path: str):
+    """
+    atomic_write() for text written a piece at a time, the block writes to the yielded temp file and path is only
+    replaced once the block finishes without an exception
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(prefix="." + os.path.basename(path) + ".", suffix=".tmp", dir=directory)
 
-    return element
+    try:
+        with os.fdopen(fd, "w") as file:
+            yield file
+            file.flush()
+            if fsync_policy == "on-save":
+                os.fsync(file.fileno())
 
+        # mkstemp creates the file as 0600, keep the mode of the file being replaced
+        os.chmod(temp_path, replaced_file_mode(path))
 
-def create_element_label(key: str, font: QFont()=None, alignment: Qt.AlignmentFlag=None) -> QLabel:
-    label = QLabel(key)
-    label.setObjectName(key + "_label")
-    if font:
-        label.setFont(font)
-    if alignment:
+        os.replace(temp_path, path)
+    except BaseException:
         try:
-            label.setAlignment(alignment)
-        except:
+            os.remove(temp_path)
+        except OSError:
             pass
+        raise
 
-    return label
+    if fsync_policy == "on-save":
+        fsync_path(path)
+    elif fsync_policy == "on-exit":
+        unsynced_paths.add(os.path.abspath(path))
 
+    # mtime may not change on coarse filesystems if the save happens quickly
+    invalidate_options_cache(path)
 
-def divide_elements(total_elements: list, divide_number: int) -> List[list]:
-    divided_elements = []
 
-    if divide_number >= 2:
-        avg_part_size = len(total_elements) // divide_number
-        remainder = len(total_elements) % divide_number
+def atomic_copy(source_path: str, path: str):
+    with open(source_path, "r") as file:
+        text = file.read()
 
-        start = 0
+    report = active_report()
+    if report is not None:
+        report.bytes_read += len(text.encode())
 
-        for i in range(divide_number):
-            end = start + avg_part_size + (1 if i < remainder else 0)
-            divided_elements.append(total_elements[start:end])
-            start = end
+    atomic_write(path, text)
 
-    else:
-        divided_elements.append(total_elements)
 
-    return divided_elements
+# lock file next to each saved settings file, see settings_file_lock()
+LOCK_SUFFIX = ".lock"
+lock_timeout = 10.0
 
 
-def inner_element_format(inner_format: dict=None) -> dict:
-    # default format
-    format = {str: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
-              int: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
-              float: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
-              bool: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
-              list: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
-              tuple: {"spacing": None, "label_alignment": None, "widget_alignment": None,"front_end_stretch": None, "backend_stretch": "stretch"}}
+def set_lock_timeout(seconds: float):
+    """
+    :param seconds: how long a save waits for another process' save of the same file before raising TimeoutError
+    """
+    global lock_timeout
+    lock_timeout = seconds
 
-    # change inner formatting if user passes in new values
-    if inner_format:
-        for key, value in inner_format.items():
-            if key in format.keys():
 
-                for inner_key, new_value in value.items():
-                    if inner_key in format[key].keys():
-                        format[key][inner_key] = new_value
+def try_lock(fd: int) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        elif msvcrt is not None:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
 
-    return format
+    return True
 
 
-def outer_element_format(outer_format: dict=None) -> dict:
-    format = {"front_end_stretch": None, "spacing": None,  "backend_stretch": "stretch"}
+def unlock(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    elif msvcrt is not None:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
 
-    if outer_format:
-        for key, value in outer_format.items():
-            if key in format.keys():
-                format[key] = value
 
-    return format
+@contextmanager
+def settings_file_lock(path: str, timeout: float = None):
+    """
+    holds an exclusive advisory lock on <path>.lock while the block runs, so the read-patch-replace of a save can't
+    interleave with another process (or thread) saving the same file.
+    The lock file stays in place, deleting it would let a waiting process lock a file nobody else uses anymore
+    :param timeout: seconds to wait for the lock, lock_timeout if None, TimeoutError when it runs out
+    """
+    timeout = lock_timeout if timeout is None else timeout
+    start = time.perf_counter()
+    fd = os.open(path + LOCK_SUFFIX, os.O_RDWR | os.O_CREAT, 0o666)
 
+    try:
+        delay = 0.001
+        while not try_lock(fd):
+            if time.perf_counter() - start >= timeout:
+                raise TimeoutError(f"could not lock {path} within {timeout} s, another save is still running")
+            time.sleep(delay)
+            delay = min(delay * 2, 0.05)
 
-def create_default_buttons(default_path: str = None, user_path: str = None, option_items_upper_widget: QWidget = None) -> QLayout:
-    format = outer_element_format({"front_end_stretch": "stretch", "backend_stretch": "stretch"})
+        report = active_report()
+        if report is not None:
+            report.add_phase("lock", time.perf_counter() - start)
 
-    save_button = QPushButton("Save")
-    save_button.setObjectName("save_button")
-    save_button.clicked.connect(lambda: save_settings(user_path=user_path, default_path=default_path,
-                                                      options_widget=option_items_upper_widget))
+        try:
+            yield
+        finally:
+            unlock(fd)
+    finally:
+        os.close(fd)
 
-    default_button = QPushButton("Reset Defaults")
-    default_button.setObjectName("default_button")
-    default_button.clicked.connect(lambda: default_settings(user_path=user_path, default_path=default_path,
-                                                            options_widget=option_items_upper_widget))
 
-    save_layout = build_outer_element([save_button, default_button], outer_format=format,
-                                      layout=QHBoxLayout())
+def default_user_path(default_path: str) -> str:
+    # per user settings file, <default file name>_<user>.txt next to this program
+    if is_sqlite_path(default_path):
+        # <default profile>_<user> profile in the same database
+        database, profile = split_sqlite_path(default_path)
+        return sqlite_path(database, profile + "_" + getpass.getuser())
 
-    return save_layout
+    default_broken = default_path.split("\\")
+    default_filename = default_broken[-1].split(".")
+    user = getpass.getuser()
+    my_path = os.path.abspath(os.path.dirname(__file__))
+    return my_path + "\\" + default_filename[0] + "_" + user + ".txt"
 
 
-def save_settings(default_path: str, options_widget: dict, user_path: str = None):
-    # if not user_path for user option files given, create it
-    if not user_path:
-        default_broken = default_path.split("\\")
-        default_filename = default_broken[-1].split(".")
-        user = getpass.getuser()
-        my_path = os.path.abspath(os.path.dirname(__file__))
-        user_path = my_path + "\\" + default_filename[0] + "_" + user + ".txt"
+def write_settings_updates(user_path: str, updates: Dict[str, Union[str, None]], default_path: str = None):
+    """
+    rewrites only the lines of the updated keys in user_path, everything else in the file stays as it is.
+    The file is read again under settings_file_lock(), so keys other running instances saved in the meantime are kept
+    :param default_path: file copied to user_path first if user_path doesn't exist yet
+    """
+    if is_sqlite_path(user_path):
+        # database does its own locking, all the updates go in 1 transaction
+        database, profile = split_sqlite_path(user_path)
+        settings_database(database).write(profile, updates, copy_from=default_path)
+        return
 
-        if not os.path.exists(user_path):
-            shutil.copy(default_path, user_path)
+    with settings_file_lock(user_path):
+        if default_path and not os.path.exists(user_path):
+            atomic_copy(default_path, user_path)
 
-    get_text_widgets = [QLineEdit]
-    get_value_widgets = [QSpinBox, QDoubleSpinBox]
-    get_checkbox_widgets = [QCheckBox]
-    get_radio_widgets = [QRadioButton]
-    get_list_widgets = [QComboBox]
+        patch_settings_file(user_path, updates)
 
-    elements = getAllElements(options_widget)
-    retreive_options = getOptions(user_path)
 
-    # build dict to save back text file with current values in the widgets
-    text_dict = {}
+def patch_settings_file(user_path: str, updates: Dict[str, str]):
+    # caller holds the lock, autosaved changes waiting in the journal go in first so updates win over them
+    journal = read_journal(user_path)
+    if journal:
+        updates = {**journal, **updates}
 
-    for key, value in retreive_options.items():
-        total_items = []
-        widget = None
+    try:
+        with open(user_path, 'r') as file:
+            lines = file.readlines()
+            report = active_report()
+            if report is not None:
+                report.bytes_read += os.fstat(file.fileno()).st_size
+    except FileNotFoundError:
+        # nothing saved yet (the sparse user file of a layered model), the file starts with the updated keys
+        lines = []
+
+    atomic_write(user_path, "".join(patch_settings_lines(lines, updates)))
+    if journal is not None:
+        remove_journal(user_path)
+
+
+# autosave journal next to each user file, see journal_settings_updates()
+JOURNAL_SUFFIX = ".journal"
+journal_max_records = 1000
+journal_max_bytes = 256 * 1024
+# records in each journal this process appended to, (realpath) -> count, compacted at exit
+journal_records = {}
+journal_records_lock = threading.Lock()
+
+
+def set_journal_limits(max_records: int = 1000, max_bytes: int = 256 * 1024):
+    """
+    a journal is compacted into its settings file once it has more records or bytes than this, which also bounds
+    how much a load (or recovery after a crash) has to replay
+    """
+    global journal_max_records, journal_max_bytes
+    journal_max_records = max_records
+    journal_max_bytes = max_bytes
 
-        for name, obj in elements.items():
-            if any(isinstance(obj, cls) for cls in get_text_widgets):
-                if key in obj.objectName():
-                    total_items.append(obj.text())
-                    widget = obj
-
-            elif any(isinstance(obj, cls) for cls in get_value_widgets):
-                if key in obj.objectName():
-                    total_items.append(str(obj.value()))
-                    widget = obj
-
-            elif any(isinstance(obj, cls) for cls in get_checkbox_widgets):
-                if key in obj.objectName():
-                    total_items.append(str(obj.isChecked()))
-                    widget = obj
-
-            elif any(isinstance(obj, cls) for cls in get_radio_widgets):
-                if key in obj.objectName():
-                    total_items.append(str(obj.text()))
-                    if obj.isChecked():
-                        total_items.append(str(obj.isChecked()))
-                    widget = obj
-
-            elif any(isinstance(obj, cls) for cls in get_list_widgets):
-                if key in obj.objectName():
-                    for i in range(obj.count()):
-                        total_items.append(obj.itemText(i))
-
-                    total_items.append(str(obj.currentIndex()))
-                    widget = obj
-
-        # turn list into proper format for dict
-        if isinstance(widget, QLineEdit):
-            edit_value = ', '.join(total_items)
-            text_dict[key] = edit_value
-
-        # turn list into proper format for dict
-        if isinstance(widget, QSpinBox) or isinstance(widget, QDoubleSpinBox):
-            edit_value = ', '.join(total_items)
-            text_dict[key] = edit_value
-
-        # turn list into proper format for dict
-        if isinstance(widget, QCheckBox):
-            edit_value = ', '.join(total_items)
-            text_dict[key] = edit_value
-
-        # turn list into proper format for dict
-        if isinstance(widget, QRadioButton):
-            total_items[0] = "(" + total_items[0]
-            total_items[-1] = total_items[-1] + ")"
-            edit_value = ', '.join(total_items)
-            text_dict[key] = edit_value
-
-        # turn list into proper format for dict
-        if isinstance(widget, QComboBox):
-            total_items[0] = "[[" + total_items[0]
-            total_items[-1] = total_items[-1] + "]]"
-            edit_value = ', '.join(total_items)
-            text_dict[key] = edit_value
-
-    # Iterate through the dictionary items and write to the file
-    with open(user_path, 'w') as file:
-        for key, value in text_dict.items():
-            file.write(f'{key} = {value}\n')
-
-
-def default_settings(default_path: str, options_widget: dict, user_path: str = None):
-    get_text_widgets = [QLineEdit]
-    get_value_widgets = [QSpinBox, QDoubleSpinBox]
-    get_checkbox_widgets = [QCheckBox]
-    get_radio_widgets = [QRadioButton]
-    get_list_widgets = [QComboBox]
-
-    # read text file to get data
-    retreive_options = getOptions(default_path)
-
-    # turn text file data to datatypes
-    data_dict = options_affix_datatypes(retreive_options)
-
-    # get all objects that i want to change values on from default text file
-    elements = getAllElements(options_widget)
-
-    # iterate through default data text file
-    for key, value in data_dict.items():
-        total_items = []
-        widget = None
-
-        # iterate through all elements to get the objects i want to change values on
-        for name, obj in elements.items():
-            if any(isinstance(obj, cls) for cls in get_text_widgets):
-                if key in obj.objectName():
-                    total_items.append(obj)
-                    widget = obj
-
-            elif any(isinstance(obj, cls) for cls in get_value_widgets):
-                if key in obj.objectName():
-                    total_items.append(obj)
-                    widget = obj
-
-            elif any(isinstance(obj, cls) for cls in get_checkbox_widgets):
-                if key in obj.objectName():
-                    total_items.append(obj)
-                    widget = obj
-
-            elif any(isinstance(obj, cls) for cls in get_radio_widgets):
-                if key in obj.objectName():
-                    total_items.append(obj)
-                    widget = obj
-
-            elif any(isinstance(obj, cls) for cls in get_list_widgets):
-                if key in obj.objectName():
-                    total_items.append(obj)
-                    widget = obj
-
-        # change object values/states from objects gathered
-        if isinstance(widget, QLineEdit):
-            if isinstance(value, List):
-                for index, text in enumerate(value):
-                    total_items[index].setText(str(text))
-            else:
-                total_items[0].setText(str(value))
 
-        if isinstance(widget, QSpinBox) or isinstance(widget, QDoubleSpinBox):
-            if isinstance(value, List):
-                for index, text in enumerate(value):
-                    total_items[index].setValue(text)
-            else:
-                total_items[0].setValue(value)
-
-        if isinstance(widget, QCheckBox):
-            if isinstance(value, List):
-                for index, text in enumerate(value):
-                    if text[index]:
-                        total_items[index].setCheckState(Qt.Checked)
-                    if not text[index]:
-                        total_items[index].setCheckState(Qt.Unchecked)
-            else:
-                if value:
-                    total_items[0].setCheckState(Qt.Checked)
-                if not value:
-                    total_items[0].setCheckState(Qt.Unchecked)
-
-        if isinstance(widget, QRadioButton):
-            if isinstance(value, List):
-                for index, text in enumerate(value):
-                    if text == True:
-                        total_items[index-1].setChecked(True)
-            else:
-                if value == True:
-                    total_items[0].setChecked(True)
+def journal_settings_updates(user_path: str, updates: Dict[str, Union[str, None]], default_path: str = None):
+    """
+    autosave, appends "key = value" records for updates to <user_path>.journal instead of rewriting user_path.
+    load_options()/getOptions() replay the journal on top of the file and every regular save folds it in, it's
+    compacted into the file past the set_journal_limits() or when the program exits
+    :param default_path: file copied to user_path first if user_path doesn't exist yet
+    """
+    # a database row write is as cheap as an append
+    if is_sqlite_path(user_path) or any(value is None for value in updates.values()):
+        write_settings_updates(user_path, updates, default_path=default_path)
+        return
+
+    realpath = os.path.realpath(user_path)
+    text = "".join(f'{key} = {value}\n' for key, value in updates.items())
+
+    with settings_file_lock(user_path):
+        if default_path and not os.path.exists(user_path):
+            atomic_copy(default_path, user_path)
+
+        with open(user_path + JOURNAL_SUFFIX, "ab+") as file:
+            # a record cut off by a crash mid-append is dropped, not completed by the records after it
+            if file.tell():
+                file.seek(-1, os.SEEK_END)
+                if file.read(1) != b"\n":
+                    file.seek(0)
+                    file.truncate(file.read().rfind(b"\n") + 1)
+            file.write(text.encode())
+            file.flush()
+            if fsync_policy == "on-save":
+                os.fsync(file.fileno())
+            size = file.tell()
+
+        with journal_records_lock:
+            if realpath not in journal_records:
+                # records another process or an earlier run left count too
+                journal_records[realpath] = len(read_journal_lines(user_path)) - len(updates)
+            journal_records[realpath] += len(updates)
+            records = journal_records[realpath]
+
+        report = active_report()
+        if report is not None:
+            report.bytes_written += len(text.encode())
+
+        if records > journal_max_records or size > journal_max_bytes:
+            compact_journal(user_path)
+
+
+def read_journal_lines(user_path: str) -> list:
+    try:
+        with open(user_path + JOURNAL_SUFFIX, "r") as file:
+            lines = file.readlines()
+    except FileNotFoundError:
+        return []
+
+    # last record cut off by a crash mid-append
+    if lines and not lines[-1].endswith("\n"):
+        lines.pop()
+    return lines
 
-        if isinstance(widget, QComboBox):
-            if value[0][-1].isdigit():
-                total_items[0].setCurrentIndex(int(value[0][-1]))
 
-    # save settings back to default for user text file
-    save_settings(default_path=default_path, options_widget=options_widget, user_path=user_path)
+def read_journal(user_path: str) -> Union[dict, None]:
+    """
+    :return: key: value text of the journal's records, later records win, None if there is no journal
+    """
+    if not os.path.exists(user_path + JOURNAL_SUFFIX):
+        return None
+
+    records = {}
+    for line in read_journal_lines(user_path):
+        if line.count("=") == 1:
+            key, _, value = line.partition("=")
+            records[key.strip()] = value.strip()
+    return records
+
+
+def replay_journal(path: str, options: Union[dict, None], typed: bool = True,
+                   schema: SettingsSchema = None) -> Union[dict, None]:
+    # options is a copy (or a fresh parse) of the file, the journal's records go on top of it
+    if options is None:
+        return None
+
+    records = read_journal(path)
+    if records:
+        if schema is not None:
+            records = {key: schema.convert(key, value) for key, value in records.items()}
+        elif typed:
+            records = {key: parse_value(value) for key, value in records.items()}
+        options.update(records)
+    return options
+
+
+def remove_journal(user_path: str):
+    try:
+        os.remove(user_path + JOURNAL_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+    with journal_records_lock:
+        journal_records.pop(os.path.realpath(user_path), None)
+
+
+def compact_journal(user_path: str, lock: bool = False):
+    """
+    folds the journal of user_path into the file and removes it
+    :param lock: take settings_file_lock(), False when the caller already holds it
+    """
+    with settings_file_lock(user_path) if lock else nullcontext():
+        if os.path.exists(user_path + JOURNAL_SUFFIX):
+            patch_settings_file(user_path, {})
+
+
+@atexit.register
+def compact_journals():
+    # clean exit, nothing is left to replay on the next start
+    with journal_records_lock:
+        paths = list(journal_records)
+
+    for path in paths:
+        try:
+            compact_journal(path, lock=True)
+        except (OSError, TimeoutError):
+            pass
+
+
+# settings in a SQLite database instead of a TXT file, "sqlite:<database path>#<profile>" (sqlite_path()) can be
+# passed wherever a settings TXT path goes: load_options(), SettingsModel, create_options_UI(), save_settings(), ...
+SQLITE_PREFIX = "sqlite:"
+SQLITE_DEFAULT_PROFILE = "default"
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS settings (
+    profile TEXT NOT NULL,
+    key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (profile, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS settings_position ON settings (profile, position);
+"""
+# open databases per (process, thread), sqlite3 connections can't be shared between threads
+sqlite_connections = threading.local()
+
+
+def is_sqlite_path(path) -> bool:
+    return isinstance(path, str) and path.startswith(SQLITE_PREFIX)
+
+
+def sqlite_path(database: str, profile: str = SQLITE_DEFAULT_PROFILE) -> str:
+    return f"{SQLITE_PREFIX}{database}#{profile}"
+
+
+def split_sqlite_path(path: str) -> tuple:
+    """
+    :return: (database path, profile), SQLITE_DEFAULT_PROFILE if path has no #profile
+    """
+    location = path[len(SQLITE_PREFIX):]
+    if "#" not in location:
+        return location, SQLITE_DEFAULT_PROFILE
+
+    database, _, profile = location.rpartition("#")
+    return database, profile
+
+
+def settings_database(database: str) -> "SettingsDatabase":
+    """
+    :return: SettingsDatabase for database, opened once per thread
+    """
+    key = (os.getpid(), os.path.abspath(database))
+    databases = getattr(sqlite_connections, "databases", None)
+    if databases is None:
+        databases = sqlite_connections.databases = {}
+
+    if key not in databases:
+        databases[key] = SettingsDatabase(database)
+    return databases[key]
+
+
+def sqlite_options(path: str, typed: bool = True) -> Union[dict, None]:
+    # the whole profile, None like a missing TXT file if it has no keys
+    database, profile = split_sqlite_path(path)
+    if not os.path.exists(database):
+        return None
+
+    raw = settings_database(database).options(profile)
+    if not raw:
+        return None
+
+    return {key: parse_value(value) for key, value in raw.items()} if typed else raw
+
+
+class SettingsDatabase:
+    """
+    Settings of any number of profiles (users) in 1 SQLite file, 1 row per (profile, key) indexed on both, so reading
+    or saving a key doesn't read or rewrite everything else. Values are stored as their TXT text, the TXT file stays
+    the interchange format, see import_settings_txt()/export_settings_txt()
+    """
+    __slots__ = ("path", "connection")
+
+    def __init__(self, path: str):
+        # only loaded when a database is used
+        import sqlite3
+
+        self.path = path
+        # autocommit, transactions are started explicitly by transaction()
+        self.connection = sqlite3.connect(path, timeout=lock_timeout, isolation_level=None)
+        # readers don't wait for a save in another process
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.executescript(SQLITE_SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """
+        runs the block in 1 write transaction, everything in it is saved or nothing is.
+        TimeoutError if another process' transaction holds the database longer than lock_timeout
+        """
+        import sqlite3
+
+        try:
+            self.connection.execute("BEGIN IMMEDIATE")
+        except sqlite3.OperationalError as error:
+            raise TimeoutError(f"could not lock {self.path} within {lock_timeout} s: {error}") from error
+
+        try:
+            yield self.connection
+        except BaseException:
+            self.connection.execute("ROLLBACK")
+            raise
+        self.connection.execute("COMMIT")
+
+    def profiles(self) -> list:
+        return [row[0] for row in self.connection.execute("SELECT DISTINCT profile FROM settings ORDER BY profile")]
+
+    def exists(self, profile: str) -> bool:
+        row = self.connection.execute("SELECT 1 FROM settings WHERE profile = ? LIMIT 1", (profile,)).fetchone()
+        return row is not None
+
+    def options(self, profile: str) -> dict:
+        """
+        :return: key: value text of profile, in the order the keys were written
+        """
+        rows = self.connection.execute("SELECT key, value FROM settings WHERE profile = ? ORDER BY position",
+                                       (profile,))
+        return dict(rows)
+
+    def get(self, profile: str, key: str, typed: bool = True):
+        """
+        :return: value of 1 key (with datatype unless typed=False), None if profile doesn't have it
+        """
+        row = self.connection.execute("SELECT value FROM settings WHERE profile = ? AND key = ?",
+                                      (profile, key)).fetchone()
+        if row is None:
+            return None
+        return parse_value(row[0]) if typed else row[0]
+
+    def write(self, profile: str, updates: Dict[str, Union[str, None]], copy_from: str = None):
+        """
+        :param updates: key: value text to write, key: None deletes the key, new keys go after the existing ones
+        :param copy_from: settings path (TXT or sqlite:) copied into profile first if profile has no keys yet
+        """
+        with self.transaction() as connection:
+            if copy_from and not self.exists(profile):
+                self.insert(connection, profile, (getOptions(copy_from) or {}).items())
+
+            deleted = [(profile, key) for key, value in updates.items() if value is None]
+            connection.executemany("DELETE FROM settings WHERE profile = ? AND key = ?", deleted)
+
+            position = self.next_position(profile)
+            connection.executemany(
+                "INSERT INTO settings (profile, key, position, value) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT (profile, key) DO UPDATE SET value = excluded.value",
+                [(profile, key, position + index, value)
+                 for index, (key, value) in enumerate(updates.items()) if value is not None])
+
+    def replace(self, profile: str, items):
+        """
+        :param items: (key, value text) pairs that become all of profile's keys, in 1 transaction
+        """
+        with self.transaction() as connection:
+            connection.execute("DELETE FROM settings WHERE profile = ?", (profile,))
+            self.insert(connection, profile, items)
+
+    def insert(self, connection, profile: str, items):
+        position = self.next_position(profile)
+        connection.executemany("INSERT OR REPLACE INTO settings (profile, key, position, value) VALUES (?, ?, ?, ?)",
+                               ((profile, key, position + index, value) for index, (key, value) in enumerate(items)))
+
+    def next_position(self, profile: str) -> int:
+        row = self.connection.execute("SELECT MAX(position) FROM settings WHERE profile = ?", (profile,)).fetchone()
+        return 0 if row[0] is None else row[0] + 1
+
+    def close(self):
+        self.connection.close()
+
+
+def import_settings_txt(txt_path: str, database: str, profile: str = SQLITE_DEFAULT_PROFILE) -> int:
+    """
+    replaces profile in database with the keys of a settings TXT file
+    :return: number of keys imported
+    """
+    if not valid_options_path(txt_path):
+        raise FileNotFoundError(f"not a valid settings TXT file: {txt_path}")
+
+    # with the autosaved changes still waiting in the file's journal
+    items = list(getOptions(txt_path).items())
+
+    settings_database(database).replace(profile, items)
+    return len(items)
+
+
+def export_settings_txt(database: str, profile: str, txt_path: str) -> int:
+    """
+    writes profile as a settings TXT file, keys in their stored order
+    :return: number of keys exported
+    """
+    options = settings_database(database).options(profile)
+    atomic_write(txt_path, "".join(f'{key} = {value}\n' for key, value in options.items()))
+    return len(options)
+
+
+class SettingsMigration:
+    """
+    Changes of a default settings file, applied to the user files saved from it (default_user_path()) by
+    migrate_settings_file(). Keys added to the default are inserted after the key before them, lines of removed keys
+    are dropped and values whose datatype no longer matches the default are converted or reset to the default.
+    Without the previous default every key the user file lacks is added and every key the default lacks is removed
+
+    Sparse user files (the overrides of a LayeredSettingsModel, create_options_UI(sources=...)) only keep the keys
+    that differ from the default, so nothing is added to them and a value that can't be converted has its line
+    dropped instead of being reset, a default written into them would stop later default changes from reaching the
+    user. With the previous default a file lacking any of its keys counts as sparse, an empty file always does
+    """
+    __slots__ = ("default", "texts", "order", "added", "removed", "retyped", "previous_keys", "sparse")
+
+    def __init__(self, default: dict, texts: dict, previous: dict = None, sparse: bool = None):
+        """
+        :param default: load_options() of the new default file
+        :param texts: getOptions() of the new default file, written as is for added/reset keys
+        :param previous: load_options() of the default file the user files were saved from
+        :param sparse: True/False if every user file is/isn't sparse, None to tell from each file
+        """
+        self.default = default
+        self.texts = texts
+        self.order = list(default)
+        self.sparse = sparse
+        self.previous_keys = set(previous) if previous is not None else None
+
+        if previous is None:
+            self.added = None
+            self.removed = None
+            self.retyped = None
+        else:
+            self.added = {key for key in default if key not in previous}
+            self.removed = {key for key in previous if key not in default}
+            # only keys whose default changed shape need their user value checked
+            self.retyped = {key for key, value in default.items()
+                            if key in previous and not same_value_shape(previous[key], value)}
+
+    @classmethod
+    def load(cls, default_path: str, previous_path: str = None, sparse: bool = None) -> "SettingsMigration":
+        default = load_options(default_path)
+        if default is None:
+            raise FileNotFoundError(f"default settings TXT file not found: {default_path}")
+
+        previous = None
+        if previous_path is not None:
+            previous = load_options(previous_path)
+            if previous is None:
+                raise FileNotFoundError(f"previous default settings TXT file not found: {previous_path}")
+
+        return cls(default, getOptions(default_path), previous, sparse=sparse)
+
+    def plan(self, path: str) -> tuple:
+        """
+        reads path 1 line at a time
+        :return: {key: new value text, None to drop the line}, {key whose line the added keys follow (None for the
+                 start of the file): [added keys]}
+        """
+        updates = {}
+        present = set()
+        # key: line text of values that can't be converted
+        resets = {}
+
+        with open(path, "r") as file:
+            for line in file:
+                if line.count("=") != 1:
+                    continue
+
+                key, _, raw = line.partition("=")
+                key = key.strip()
+                present.add(key)
+
+                if key not in self.default:
+                    if self.removed is None or key in self.removed:
+                        updates[key] = None
+                elif self.retyped is None or key in self.retyped:
+                    raw = raw.strip()
+                    value = migrate_value(parse_value(raw), self.default[key])
+                    if value is None:
+                        resets[key] = raw
+                    elif format_value(value) != raw:
+                        updates[key] = format_value(value)
+
+        sparse = self.sparse
+        if sparse is None:
+            sparse = not present or (self.previous_keys is not None and not self.previous_keys <= present)
+
+        # a sparse file drops the override, the default shows through
+        for key, raw in resets.items():
+            if sparse:
+                updates[key] = None
+            elif self.texts[key] != raw:
+                updates[key] = self.texts[key]
+
+        inserts = {}
+        if not sparse:
+            anchor = None
+            for key in self.order:
+                if key in present:
+                    anchor = key
+                elif self.added is None or key in self.added:
+                    inserts.setdefault(anchor, []).append(key)
+
+        return updates, inserts
+
+
+def same_value_shape(current, value) -> bool:
+    # radio/combobox choices count as part of the datatype
+    if not same_value_type(current, value) or not same_value_type(value, current):
+        return False
+    if type(value) == tuple:
+        return choice_items(current) == choice_items(value)
+    if type(value) == list and value and type(value[0]) == list:
+        return bool(current) and type(current[0]) == list and current[0][:-1] == value[0][:-1]
+    return True
+
+
+def choice_items(value: tuple) -> list:
+    return [item for item in value if item.upper() not in ("TRUE", "FALSE")]
+
+
+def migrate_value(value, default):
+    """
+    :return: value converted to the datatype of default, None if it can't be kept
+    """
+    if type(default) == float and type(value) == int:
+        return float(value)
+    if type(default) == int and type(value) == float:
+        return int(value) if value.is_integer() else None
+    if type(default) != type(value):
+        return None
+
+    # radio: keep the checked choice if the new default still has it, TRUE follows the checked choice
+    if type(default) == tuple:
+        choices = choice_items(default)
+        if choice_items(value) == choices:
+            return value
+        checked = [item for item, marker in zip(value, value[1:]) if marker.upper() == "TRUE"]
+        if not checked or checked[0] not in choices:
+            return None
+        migrated = []
+        for item in choices:
+            migrated.append(item)
+            if item == checked[0]:
+                migrated.append("TRUE")
+        return tuple(migrated)
+
+    # combobox: keep the selected item if the new default still has it
+    if type(default) == list and default and type(default[0]) == list:
+        if not value or type(value[0]) != list:
+            return None
+        items, index = value[0][:-1], value[0][-1]
+        if items == default[0][:-1]:
+            return value
+        if not index.isdigit() or int(index) >= len(items) or items[int(index)] not in default[0][:-1]:
+            return None
+        return [default[0][:-1] + [str(default[0].index(items[int(index)]))]]
+
+    return value
+
+
+def migrate_settings_file(path: str, migration: SettingsMigration, dry_run: bool = False) -> dict:
+    """
+    applies migration to 1 user settings file, the file is read and rewritten 1 line at a time under
+    settings_file_lock() and atomically replaced, files that don't change aren't written
+    :param dry_run: only work out the changes
+    :return: counts of the "added", "removed" and "retyped" keys
+    """
+    with settings_file_lock(path) if not dry_run else nullcontext():
+        if not dry_run:
+            compact_journal(path)
+        updates, inserts = migration.plan(path)
+        removed = sum(1 for key in updates if key not in migration.default)
+        counts = {"added": sum(len(keys) for keys in inserts.values()), "removed": removed,
+                  "retyped": len(updates) - removed}
+        if dry_run or not (updates or inserts):
+            return counts
+
+        texts = migration.texts
+        with open(path, "r") as source, atomic_file(path) as file:
+            # keys added before the first key of the file go above its first setting line
+            start = inserts.pop(None, ())
+            for line in source:
+                if not line.endswith("\n"):
+                    line += "\n"
+                if line.count("=") != 1:
+                    file.write(line)
+                    continue
+
+                for added in start:
+                    file.write(f'{added} = {texts[added]}\n')
+                start = ()
+
+                key = line.partition("=")[0].strip()
+                if key in updates:
+                    if updates[key] is None:
+                        continue
+                    line = f'{key} = {updates[key]}\n'
+                file.write(line)
+
+                for added in inserts.pop(key, ()):
+                    file.write(f'{added} = {texts[added]}\n')
+
+            for added in start:
+                file.write(f'{added} = {texts[added]}\n')
+
+    return counts
+
+
+def __getattr__(name: str):
+    # widget side (create_options_UI(), getAllElements(), save_settings(), ...) is only imported on first use
+    if name.startswith("__"):
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+    import Option_Settings_UI
+
+    try:
+        return getattr(Option_Settings_UI, name)
+    except AttributeError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
 
 
 if __name__ == "__main__":
-    pass
\ No newline at end of file
+    pass
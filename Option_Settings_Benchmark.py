@@ -0,0 +1,710 @@
+from ast import literal_eval
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import Option_Settings_Auto as settings
+
+
+"""
+Benchmarks for Option_Settings_Auto
+
+python Option_Settings_Benchmark.py parse --lines 100000
+python Option_Settings_Benchmark.py import
+python Option_Settings_Benchmark.py locking --processes 8 --saves 100
+python Option_Settings_Benchmark.py search --lines 10000 --columns 4
+python Option_Settings_Benchmark.py switch --lines 2000 --columns 4
+python Option_Settings_Benchmark.py profiles --lines 2000 --columns 4
+python Option_Settings_Benchmark.py build --sizes 100,1000,10000 --lengths 10,100,1000
+python Option_Settings_Benchmark.py sidecar --lines 100000
+python Option_Settings_Benchmark.py sqlite --lines 100000
+python Option_Settings_Benchmark.py schema --lines 100000
+python Option_Settings_Benchmark.py journal --lines 100000
+python Option_Settings_Benchmark.py suite --sizes 10,100,1000,10000,100000 --output results.json
+python Option_Settings_Benchmark.py compare --baseline baseline.json --current results.json --threshold 0.2
+
+- parse: streaming iter_options()/load_options() vs the old readlines() getOptions() + options_affix_datatypes() path,
+         load_options() once without (cold) and once from the parse cache
+- sidecar: a cold load_options() (no parse cache) from the TXT file vs from its up to date binary sidecar, the
+           parse part of create_options_UI(sidecar=True) startup
+- schema: load_options() guessing every value's datatype vs converting it to the type a schema declares, the
+          schema's compile time and validating every key against it
+- sqlite: saving/reading 1 key and loading every key of a TXT file vs the same settings imported into a SQLite
+          database (sqlite:<database>#<profile> paths)
+- journal: saving 1 key by patching the file vs appending it to the autosave journal, the extra load time of
+           replaying a journal at the compaction limit and the compaction itself
+- locking: stress test, processes that each load the same file once, then repeatedly change their own key and save
+           it like concurrently running instances do. Exits with 1 if any process' last save is missing from the file
+- search: types queries into the search box of a create_options_UI(search=True) panel, per keystroke the time of
+          the filter() call (index lookup and the first step of rows), the longest event loop turn (a step of
+          show/hide/column balancing and/or the layout/repaint events of the one before) and the time until every
+          row is changed and laid out. The panel is shown in a 1200x800 scroll area like a program would show that
+          many rows
+- switch: a shown panel switched between 2 settings files of the same size, a new panel replacing it (and the old
+          one deleted) vs create_options_UI(reuse=panel) rebuilding it with its own widgets, both until the
+          layout/repaint events are done. Median and max of --repeat switches in a row, peak memory of 1 more.
+          Prints the widget pool's hit rate
+- profiles: 3 profiles of the same keys with 1% of the values changed each, loaded as SettingsProfiles vs a
+            SettingsModel per file, and switching a shown panel between them with a new panel, reuse=panel and
+            switch_profile()
+- build: create_options_UI() time per entry for growing files, and per item for 1 list / 1 radio tuple of growing
+         length, both stay flat when the build is linear
+- import: -X importtime of the parser alone vs with the widget side (PyQt5) loaded, peak memory is the process max RSS
+- suite: times every stage (parse, build with 1 and N columns, getAllElements, save, reset) on synthetic files of
+         each size, runs headless (QT_QPA_PLATFORM=offscreen) and writes the results as JSON.
+         Peak memory is what tracemalloc sees, so Python allocations only, not the Qt side of the widgets
+- compare: exits with 1 if any result in current is slower than in baseline by more than threshold
+
+"""
+
+
+# one line of every form the TXT file accepts, cycled to fill the synthetic file
+LINE_FORMS = ["name{0} = value{0}",
+              "count{0} = {0}",
+              "ratio{0} = {0}.5",
+              "enabled{0} = TRUE",
+              "disabled{0} = FALSE",
+              "sizes{0} = 1, 2, {0}",
+              "words{0} = a, b, c{0}",
+              "floats{0} = 1.5, 2.5, {0}.25",
+              "mode{0} = (fast, slow, TRUE, medium)",
+              "choice{0} = [[red, green, blue, 1]]"]
+
+
+def write_settings_file(path: str, lines: int) -> str:
+    with open(path, "w") as file:
+        for i in range(lines):
+            file.write(LINE_FORMS[i % len(LINE_FORMS)].format(i) + "\n")
+
+    return path
+
+
+def legacy_parse(path: str) -> dict:
+    # getOptions() + options_affix_datatypes() as they were before the streaming parser, kept for comparison
+    main_settings = open(path, "r")
+    main_settings_list = main_settings.readlines()
+
+    main_settings_list = [x.strip('\n') for x in main_settings_list if x.count('=') == 1]
+    options_dict = {key_value[0].strip(): key_value[1].strip() for key_value in (i.split("=") for i in main_settings_list)}
+
+    for key in options_dict:
+        if "," in options_dict[key]:
+            temp_split = options_dict[key].split(",")
+            final_value = [x.strip() for x in temp_split]
+
+            if "(" == final_value[0][0] and ")" == final_value[-1][-1]:
+                final_value[0] = final_value[0].strip("(")
+                final_value[-1] = final_value[-1].strip(")")
+                final_value = tuple(x for x in final_value)
+
+            elif "[[" == final_value[0][0:2] and "]]" == final_value[-1][-2:]:
+                final_value[0] = final_value[0].strip("[[")
+                final_value[-1] = final_value[-1].strip("]]")
+                final_value = [[x for x in final_value]]
+
+            elif all(x.isdigit() for x in final_value):
+                final_value = [int(x) for x in final_value]
+
+            else:
+                try:
+                    final_value = [literal_eval(s) for s in final_value]
+                except:
+                    pass
+
+            options_dict[key] = final_value
+
+        elif "TRUE" == options_dict[key].upper() or "FALSE" == options_dict[key].upper():
+            options_dict[key] = bool(options_dict[key])
+
+        elif options_dict[key].isdigit():
+            options_dict[key] = int(options_dict[key])
+
+        else:
+            try:
+                options_dict[key] = float(options_dict[key])
+            except:
+                pass
+
+    return options_dict
+
+
+def measure(function, *args, repeat: int = 3, setup=None) -> dict:
+    """
+    :param setup: called before every run of function, not timed
+    :return: best wall time in seconds and peak traced memory in bytes of function(*args)
+    """
+    best = None
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    function(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"seconds": best, "peak_bytes": peak}
+
+
+def consume(iterator):
+    for _ in iterator:
+        pass
+
+
+def bench_parse(lines: int, repeat: int = 3) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_settings_file(os.path.join(directory, "bench.txt"), lines)
+
+        cold = settings.invalidate_options_cache
+
+        # cold loads parse the file, a warm load of the unchanged file is a parse cache hit
+        return {"legacy getOptions + options_affix_datatypes": measure(legacy_parse, path, repeat=repeat),
+                "load_options": measure(settings.load_options, path, repeat=repeat, setup=cold),
+                "load_options (parse cache hit)": measure(settings.load_options, path, repeat=repeat),
+                "iter_options (streamed, not kept)": measure(lambda p: consume(settings.iter_options(p)), path,
+                                                             repeat=repeat)}
+
+
+def bench_sidecar(lines: int, repeat: int = 3) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_settings_file(os.path.join(directory, "bench.txt"), lines)
+        # written once here, every timed load below reads it
+        settings.load_options(path, sidecar=True)
+        cold = settings.invalidate_options_cache
+
+        return {"load_options (text parse)": measure(settings.load_options, path, repeat=repeat, setup=cold),
+                "load_options (sidecar)": measure(lambda p: settings.load_options(p, sidecar=True), path,
+                                                  repeat=repeat, setup=cold)}
+
+
+def bench_schema(lines: int, repeat: int = 3) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_settings_file(os.path.join(directory, "bench.txt"), lines)
+        schema_path = os.path.join(directory, "bench.schema.txt")
+        schema_text = settings.SettingsSchema.from_options(settings.load_options(path)).text()
+        with open(schema_path, "w") as file:
+            file.write(schema_text)
+        cold = settings.invalidate_options_cache
+
+        schema = settings.load_schema(schema_path)
+        values = settings.load_options(path, schema=schema)
+        return {"load_options (inferred types)": measure(settings.load_options, path, repeat=repeat, setup=cold),
+                "load_options (schema types)": measure(lambda p: settings.load_options(p, schema=schema), path,
+                                                       repeat=repeat, setup=cold),
+                "compile schema": measure(settings.SettingsSchema.parse, schema_text.splitlines(),
+                                          repeat=repeat),
+                "validate all keys": measure(schema.validate, values, True, repeat=repeat)}
+
+
+def bench_sqlite(lines: int, repeat: int = 3) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_settings_file(os.path.join(directory, "bench.txt"), lines)
+        database = os.path.join(directory, "bench.db")
+        settings.import_settings_txt(path, database)
+        store = settings.settings_database(database)
+        sqlite_path = settings.sqlite_path(database)
+        # key in the middle of the file
+        key = f"count{lines // 2 // 10 * 10 + 1}"
+        cold = settings.invalidate_options_cache
+
+        results = {"save 1 key (TXT)": measure(settings.write_settings_updates, path, {key: "7"}, repeat=repeat),
+                   "save 1 key (sqlite)": measure(settings.write_settings_updates, sqlite_path, {key: "7"},
+                                                  repeat=repeat),
+                   "read 1 key (TXT, load_options)": measure(lambda: settings.load_options(path)[key],
+                                                             repeat=repeat, setup=cold),
+                   "read 1 key (sqlite)": measure(store.get, settings.SQLITE_DEFAULT_PROFILE, key, repeat=repeat),
+                   "load all (TXT)": measure(settings.load_options, path, repeat=repeat, setup=cold),
+                   "load all (sqlite)": measure(settings.load_options, sqlite_path, repeat=repeat)}
+        store.close()
+        return results
+
+
+def bench_journal(lines: int, repeat: int = 3) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_settings_file(os.path.join(directory, "bench.txt"), lines)
+        key = f"count{lines // 2 // 10 * 10 + 1}"
+        cold = settings.invalidate_options_cache
+
+        def fill_journal():
+            # a journal right below the compaction limit, the most a load after a crash replays
+            settings.compact_journal(path, lock=True)
+            with open(path + settings.JOURNAL_SUFFIX, "w") as file:
+                file.writelines(f"{key} = {value}\n" for value in range(settings.journal_max_records))
+            settings.invalidate_options_cache()
+
+        results = {"save 1 key (patch file)": measure(settings.write_settings_updates, path, {key: "7"},
+                                                      repeat=repeat),
+                   "save 1 key (journal append)": measure(settings.journal_settings_updates, path, {key: "8"},
+                                                          repeat=repeat),
+                   "load, no journal": measure(settings.load_options, path, repeat=repeat,
+                                               setup=lambda: (settings.compact_journal(path, lock=True), cold())),
+                   f"load, {settings.journal_max_records} journal records": measure(settings.load_options, path,
+                                                                                   repeat=repeat, setup=fill_journal),
+                   "compact": measure(settings.compact_journal, path, True, repeat=repeat, setup=fill_journal)}
+        settings.remove_journal(path)
+        return results
+
+
+def locking_worker(path: str, worker: int, saves: int) -> float:
+    # stale snapshot on purpose, every save has to merge into what the other processes wrote
+    model = settings.SettingsModel.load(path)
+    key = f"worker{worker}"
+
+    start = time.perf_counter()
+    for i in range(1, saves + 1):
+        model.set(key, i)
+        model.save()
+
+    return time.perf_counter() - start
+
+
+def bench_locking(processes: int = 8, saves: int = 100, lines: int = 1000) -> dict:
+    """
+    :return: seconds for all saves, saves per second and the keys whose last saved value got lost
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_settings_file(os.path.join(directory, "shared.txt"), lines)
+        with open(path, "a") as file:
+            file.writelines(f"worker{worker} = 0\n" for worker in range(processes))
+        expected = settings.load_options(path)
+        expected.update({f"worker{worker}": saves for worker in range(processes)})
+
+        start = time.perf_counter()
+        with multiprocessing.Pool(processes) as pool:
+            pool.starmap(locking_worker, [(path, worker, saves) for worker in range(processes)])
+        seconds = time.perf_counter() - start
+
+        settings.invalidate_options_cache()
+        result = settings.load_options(path)
+        lost = [key for key, value in expected.items() if result.get(key) != value]
+
+    return {"seconds": seconds, "saves per second": processes * saves / seconds, "lost": lost}
+
+
+# typed 1 character at a time, then deleted again
+SEARCH_QUERIES = ["name9", "ratio1", "enabled12"]
+
+
+def bench_search(lines: int, columns: int = 4) -> dict:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication, QScrollArea
+    app = QApplication.instance() or QApplication([])
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_settings_file(os.path.join(directory, "bench.txt"), lines)
+        widget = settings.create_options_UI(user_path=path, columns=columns, search=True)
+        window = QScrollArea()
+        window.setWidgetResizable(True)
+        window.setWidget(widget)
+        window.resize(1200, 800)
+        window.show()
+        app.processEvents()
+        search = widget.settings_search
+
+        keystrokes = []
+        for query in SEARCH_QUERIES:
+            keystrokes += [query[:i] for i in range(1, len(query) + 1)]
+            keystrokes += [query[:i] for i in range(len(query) - 1, -1, -1)]
+
+        # a keystroke that changes many rows is finished over several event loop turns, each should stay short
+        filter_times = []
+        turn_times = []
+        done_times = []
+        for text in keystrokes:
+            start = time.perf_counter()
+            search.filter(text)
+            filter_times.append(time.perf_counter() - start)
+
+            turns = []
+            turn_start = start
+            while True:
+                finished = not search.remaining()
+                app.processEvents()
+                now = time.perf_counter()
+                turns.append(now - turn_start)
+                turn_start = now
+                # the layout/repaint of the last step happens in the turn after it
+                if finished:
+                    break
+            turn_times.append(max(turns))
+            done_times.append(now - start)
+
+        window.deleteLater()
+        app.processEvents()
+
+    results = {}
+    for name, times in (("filter", filter_times), ("longest event loop turn", turn_times),
+                        ("until all rows changed", done_times)):
+        times.sort()
+        results[f"{name} median"] = {"seconds": times[len(times) // 2], "peak_bytes": 0}
+        results[f"{name} max"] = {"seconds": times[-1], "peak_bytes": 0}
+    return results
+
+
+def bench_switch(lines: int, columns: int = 4, repeat: int = 3) -> dict:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import QEvent
+    from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout
+    app = QApplication.instance() or QApplication([])
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [write_settings_file(os.path.join(directory, f"profile{i}.txt"), lines) for i in range(2)]
+        window = QWidget()
+        layout = QVBoxLayout(window)
+        panels = [settings.create_options_UI(user_path=paths[0], columns=columns)]
+        layout.addWidget(panels[0])
+        window.show()
+        app.processEvents()
+
+        def switch(reuse: bool) -> float:
+            start = time.perf_counter()
+            # the other file than the one shown
+            path = paths[len(panels) % 2]
+            panel = settings.create_options_UI(user_path=path, columns=columns, reuse=panels[-1] if reuse else None)
+            if panel is not panels[-1]:
+                layout.replaceWidget(panels[-1], panel)
+                panels[-1].deleteLater()
+            panels.append(panel)
+            app.processEvents()
+            # deleteLater() waits for a running event loop otherwise
+            app.sendPostedEvents(None, QEvent.DeferredDelete)
+            return time.perf_counter() - start
+
+        # each switch starts from what the one before left (panel, pool), so not best-of-N like measure(). The first
+        # switch of a way starts from the other way's panel and isn't timed
+        results = {}
+        for name, reuse in (("new panel", False), ("reuse=panel", True)):
+            switch(reuse)
+            times = sorted(switch(reuse) for _ in range(repeat))
+            tracemalloc.start()
+            switch(reuse)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            results[f"{name} median"] = {"seconds": times[len(times) // 2], "peak_bytes": peak}
+            results[f"{name} max"] = {"seconds": times[-1], "peak_bytes": peak}
+        results["hit rate"] = panels[-1].widget_pool.hit_rate
+
+        window.deleteLater()
+        app.processEvents()
+
+    return results
+
+
+def write_profile_files(directory: str, lines: int, count: int = 3, changed: float = 0.01) -> dict:
+    # profile files with the same keys, each with its own share of changed values
+    path = write_settings_file(os.path.join(directory, "profile0.txt"), lines)
+    options = settings.load_options(path)
+    int_keys = [key for key, value in options.items() if type(value) == int]
+    step = max(1, int(1 / changed) // 10)
+
+    paths = {"profile0": path}
+    for i in range(1, count):
+        values = dict(options)
+        for key in int_keys[i::step][:max(1, int(lines * changed))]:
+            values[key] += 1000 * i
+        paths[f"profile{i}"] = os.path.join(directory, f"profile{i}.txt")
+        with open(paths[f"profile{i}"], "w") as file:
+            file.write("".join(f"{key} = {settings.format_value(value)}\n" for key, value in values.items()))
+
+    return paths
+
+
+def bench_profiles(lines: int, columns: int = 4, repeat: int = 3) -> dict:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtCore import QEvent
+    from PyQt5.QtWidgets import QApplication, QWidget, QVBoxLayout
+    app = QApplication.instance() or QApplication([])
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_profile_files(directory, lines)
+        names = list(paths)
+
+        # cold loads, not parse cache hits
+        results = {"load SettingsModel per file": measure(lambda: [settings.SettingsModel.load(path)
+                                                                   for path in paths.values()],
+                                                          repeat=repeat, setup=settings.invalidate_options_cache),
+                   "load SettingsProfiles": measure(settings.SettingsProfiles.load, paths, repeat=repeat,
+                                                    setup=settings.invalidate_options_cache)}
+
+        profiles = settings.SettingsProfiles.load(paths)
+        window = QWidget()
+        layout = QVBoxLayout(window)
+        panels = [settings.create_options_UI(profiles=profiles, columns=columns)]
+        layout.addWidget(panels[0])
+        window.show()
+        app.processEvents()
+
+        switches = [0]
+
+        def switch(how: str):
+            switches[0] += 1
+            name = names[switches[0] % len(names)]
+            if how == "switch_profile()":
+                settings.switch_profile(panels[-1], profiles, name)
+            else:
+                profiles.activate(name)
+                panel = settings.create_options_UI(profiles=profiles, columns=columns,
+                                                   reuse=panels[-1] if how == "reuse=panel" else None)
+                if panel is not panels[-1]:
+                    layout.replaceWidget(panels[-1], panel)
+                    panels[-1].deleteLater()
+                panels.append(panel)
+            app.processEvents()
+            # deleteLater() waits for a running event loop otherwise
+            app.sendPostedEvents(None, QEvent.DeferredDelete)
+
+        for how in ("new panel", "reuse=panel", "switch_profile()"):
+            results[f"switch, {how}"] = measure(switch, how, repeat=repeat)
+
+        window.deleteLater()
+        app.processEvents()
+
+    return results
+
+
+def bench_build(sizes: list, lengths: list, columns: int = 4, repeat: int = 3) -> dict:
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+
+    def build(path: str):
+        settings.create_options_UI(user_path=path, columns=columns).deleteLater()
+        app.processEvents()
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        for size in sizes:
+            path = write_settings_file(os.path.join(directory, f"entries{size}.txt"), size)
+            result = measure(build, path, repeat=repeat)
+            results[f"{size} entries (per entry)"] = {"seconds": result["seconds"] / size,
+                                                      "peak_bytes": result["peak_bytes"]}
+
+        for length in lengths:
+            path = os.path.join(directory, f"list{length}.txt")
+            with open(path, "w") as file:
+                file.write("items = " + ", ".join(str(i % 7) for i in range(length)) + "\n")
+            result = measure(build, path, repeat=repeat)
+            results[f"list of {length} (per item)"] = {"seconds": result["seconds"] / length,
+                                                       "peak_bytes": result["peak_bytes"]}
+
+            with open(path, "w") as file:
+                file.write("choice = (" + ", ".join(f"option{i}" for i in range(length)) + ", TRUE)\n")
+            result = measure(build, path, repeat=repeat)
+            results[f"radio tuple of {length} (per item)"] = {"seconds": result["seconds"] / length,
+                                                              "peak_bytes": result["peak_bytes"]}
+
+    return results
+
+
+# code run in a fresh interpreter for each import case, prints the max RSS in KiB (Linux) at the end
+IMPORT_CASES = {"import Option_Settings_Auto (parser only)": "import Option_Settings_Auto",
+                "import Option_Settings_Auto + create_options_UI (PyQt5)":
+                    "import Option_Settings_Auto; Option_Settings_Auto.create_options_UI"}
+
+
+def import_time(code: str) -> dict:
+    """
+    :return: summed cumulative -X importtime of all top level imports in seconds and max RSS in bytes
+    """
+    code += "; import resource; print(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+    process = subprocess.run([sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True,
+                             cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+
+    total_us = 0
+    for line in process.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package, nested imports are indented
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, package = line[len("import time:"):].split("|")
+        if not package.startswith("  "):
+            total_us += int(cumulative_us)
+
+    return {"seconds": total_us / 1000000, "peak_bytes": int(process.stdout.split()[-1]) * 1024}
+
+
+def bench_import(repeat: int = 3) -> dict:
+    results = {}
+    for name, code in IMPORT_CASES.items():
+        runs = [import_time(code) for _ in range(repeat)]
+        results[name] = min(runs, key=lambda run: run["seconds"])
+
+    return results
+
+
+def bench_suite(sizes: list, columns: int = 4, repeat: int = 3) -> list:
+    """
+    :return: list of {"operation", "keys", "seconds", "peak_bytes"} for every stage at every size
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt5.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication([])
+
+    results = []
+
+    def record(operation: str, keys: int, result: dict):
+        results.append({"operation": operation, "keys": keys, **result})
+        print(f"  {operation:<35} {keys:>7} keys {result['seconds'] * 1000:10.1f} ms  "
+              f"{result['peak_bytes'] / 1024 / 1024:8.2f} MiB peak", flush=True)
+
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            default_path = write_settings_file(os.path.join(directory, "default.txt"), size)
+            user_path = os.path.join(directory, "user.txt")
+            shutil.copy(default_path, user_path)
+
+            # parse stages, without the parse cache
+            record("getOptions", size, measure(settings.getOptions, default_path, repeat=repeat,
+                                               setup=settings.invalidate_options_cache))
+            raw = settings.read_raw_options(default_path)
+            record("options_affix_datatypes", size, measure(lambda: settings.options_affix_datatypes(dict(raw)),
+                                                            repeat=repeat))
+
+            # widget stages, panel built from the cached parse like repeat opens in an application are
+            record("create_options_UI columns=1", size,
+                   measure(settings.create_options_UI, user_path, 1, repeat=repeat))
+            record(f"create_options_UI columns={columns}", size,
+                   measure(settings.create_options_UI, user_path, columns, repeat=repeat))
+
+            widget = settings.create_options_UI(user_path=user_path, columns=columns)
+            registry = widget.settings_registry
+            record("getAllElements", size, measure(settings.getAllElements, widget, repeat=repeat))
+
+            # every key changed so the whole file gets written
+            record("save_settings (all keys changed)", size,
+                   measure(settings.save_settings, default_path, widget, user_path, repeat=repeat,
+                           setup=lambda: registry.dirty.update(registry.entries)))
+
+            # every int off by 1 from the default before each reset
+            changed = {key: value + 1 for key, value in registry.model.items() if type(value) == int}
+            record("default_settings", size,
+                   measure(settings.default_settings, default_path, widget, user_path, repeat=repeat,
+                           setup=lambda: registry.apply_values(changed)))
+
+            widget.deleteLater()
+            app.processEvents()
+
+    return results
+
+
+def write_results(path: str, results: list):
+    meta = {"python": platform.python_version(), "platform": platform.platform(), "time": time.time()}
+    with open(path, "w") as file:
+        json.dump({"meta": meta, "results": results}, file, indent=2)
+
+
+def compare_results(baseline_path: str, current_path: str, threshold: float = 0.2, min_seconds: float = 0.001) -> list:
+    """
+    :param threshold: allowed slowdown, 0.2 = 20 %
+    :param min_seconds: differences smaller than this are noise and never flagged
+    :return: list of (operation, keys, baseline seconds, current seconds) that got slower than allowed
+    """
+    with open(baseline_path) as file:
+        baseline = {(r["operation"], r["keys"]): r for r in json.load(file)["results"]}
+    with open(current_path) as file:
+        current = json.load(file)["results"]
+
+    regressions = []
+    for result in current:
+        old = baseline.get((result["operation"], result["keys"]))
+        if old is None:
+            continue
+
+        if result["seconds"] > old["seconds"] * (1 + threshold) and result["seconds"] - old["seconds"] > min_seconds:
+            regressions.append((result["operation"], result["keys"], old["seconds"], result["seconds"]))
+
+    return regressions
+
+
+def print_results(title: str, results: dict, unit: str = "ms"):
+    """
+    :param unit: "ms" or "us" for the times
+    """
+    scale = 1000000 if unit == "us" else 1000
+    print(title)
+    for name, result in results.items():
+        print(f"  {name:<50} {result['seconds'] * scale:10.1f} {unit}  "
+              f"{result['peak_bytes'] / 1024 / 1024:8.2f} MiB peak")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Option_Settings_Auto benchmarks")
+    parser.add_argument("benchmark", choices=["parse", "sidecar", "schema", "sqlite", "journal", "locking", "search",
+                                              "switch", "profiles", "build", "import", "suite", "compare"])
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="comma separated key counts for suite")
+    parser.add_argument("--columns", type=int, default=4, help="N columns for the create_options_UI suite stage")
+    parser.add_argument("--lengths", default="10,100,1000", help="comma separated list/tuple lengths for build")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", default="bench_baseline.json")
+    parser.add_argument("--current", default="bench_results.json")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    parser.add_argument("--processes", type=int, default=8, help="concurrent savers for locking")
+    parser.add_argument("--saves", type=int, default=100, help="saves per process for locking")
+    args = parser.parse_args()
+
+    if args.benchmark == "parse":
+        print_results(f"parse {args.lines} lines", bench_parse(args.lines, args.repeat))
+    elif args.benchmark == "sidecar":
+        print_results(f"sidecar {args.lines} lines", bench_sidecar(args.lines, args.repeat))
+    elif args.benchmark == "schema":
+        print_results(f"schema {args.lines} lines", bench_schema(args.lines, args.repeat))
+    elif args.benchmark == "sqlite":
+        print_results(f"sqlite {args.lines} lines", bench_sqlite(args.lines, args.repeat))
+    elif args.benchmark == "journal":
+        print_results(f"journal {args.lines} lines", bench_journal(args.lines, args.repeat))
+    elif args.benchmark == "locking":
+        result = bench_locking(args.processes, args.saves, min(args.lines, 1000))
+        print(f"locking {args.processes} processes x {args.saves} saves: {result['seconds'] * 1000:.1f} ms, "
+              f"{result['saves per second']:.0f} saves/s")
+        if result["lost"]:
+            print(f"LOST UPDATES {result['lost']}")
+            sys.exit(1)
+        print("no lost updates")
+    elif args.benchmark == "search":
+        print_results(f"search {args.lines} keys, {args.columns} columns", bench_search(args.lines, args.columns))
+    elif args.benchmark == "switch":
+        results = bench_switch(args.lines, args.columns, args.repeat)
+        hit_rate = results.pop("hit rate")
+        print_results(f"switch {args.lines} keys, {args.columns} columns", results)
+        print(f"  widget pool hit rate {hit_rate:.1%}")
+    elif args.benchmark == "profiles":
+        print_results(f"profiles {args.lines} keys, {args.columns} columns", bench_profiles(args.lines, args.columns,
+                                                                                          args.repeat))
+    elif args.benchmark == "build":
+        sizes = [int(size) for size in args.sizes.split(",")]
+        lengths = [int(length) for length in args.lengths.split(",")]
+        print_results("build", bench_build(sizes, lengths, columns=args.columns, repeat=args.repeat), unit="us")
+    elif args.benchmark == "import":
+        print_results("import", bench_import(args.repeat))
+
+    elif args.benchmark == "suite":
+        sizes = [int(size) for size in args.sizes.split(",")]
+        write_results(args.output, bench_suite(sizes, columns=args.columns, repeat=args.repeat))
+        print(f"results written to {args.output}")
+
+    elif args.benchmark == "compare":
+        regressions = compare_results(args.baseline, args.current, threshold=args.threshold)
+        for operation, keys, old, new in regressions:
+            print(f"REGRESSION {operation} at {keys} keys: {old * 1000:.1f} ms -> {new * 1000:.1f} ms")
+        if regressions:
+            sys.exit(1)
+        print("no regressions")
+
+
+if __name__ == "__main__":
+    main()
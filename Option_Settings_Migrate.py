@@ -0,0 +1,163 @@
+import argparse
+import fnmatch
+import multiprocessing
+import os
+import sys
+import time
+
+import Option_Settings_Auto as settings
+
+
+"""
+Applies a changed default settings TXT file to every user settings file saved from it
+
+python Option_Settings_Migrate.py settings.txt users/ --previous settings_old.txt
+python Option_Settings_Migrate.py settings.txt users/ --dry-run
+python Option_Settings_Migrate.py settings.txt users/ --pattern "*.txt" --processes 4
+python Option_Settings_Migrate.py settings.txt users/ --previous settings_old.txt --sparse
+
+- users/ is scanned (with --recursive its subdirectories too) for <default name>_*.txt, the file names
+  default_user_path() gives, or --pattern
+- each file gets the keys added to the default, loses the keys removed from it and has values whose datatype no
+  longer matches the default converted or reset, see Option_Settings_Auto.SettingsMigration. Without --previous
+  every user file is made to have exactly the keys of the default
+- --sparse for user files that only keep the keys differing from the default (create_options_UI(sources=...)),
+  keys are never added to them and values that can't be converted lose their line so the default shows through.
+  Without it a file counts as sparse if it's empty or (with --previous) lacks any key of the previous default
+- files are read and rewritten 1 line at a time and atomically replaced, under the same lock as saves from running
+  instances, on a process pool with 1 process per core by default
+- --dry-run only prints the changes, exits with 1 if any file failed
+
+"""
+
+
+# per worker process, built once by init_worker() instead of being sent with every file
+worker_migration = None
+
+
+def init_worker(default_path: str, previous_path: str = None, sparse: bool = None):
+    global worker_migration
+    worker_migration = settings.SettingsMigration.load(default_path, previous_path, sparse=sparse)
+
+
+def migrate_worker(path: str, dry_run: bool) -> tuple:
+    """
+    :return: (path, counts, error message or None)
+    """
+    try:
+        return path, settings.migrate_settings_file(path, worker_migration, dry_run=dry_run), None
+    except (OSError, UnicodeDecodeError, TimeoutError) as error:
+        return path, None, f"{type(error).__name__}: {error}"
+
+
+def find_user_files(directory: str, pattern: str, recursive: bool = False, exclude: str = None) -> list:
+    exclude = os.path.realpath(exclude) if exclude else None
+    paths = []
+    for root, directories, files in os.walk(directory):
+        for name in fnmatch.filter(files, pattern):
+            path = os.path.join(root, name)
+            if os.path.realpath(path) != exclude:
+                paths.append(path)
+        if not recursive:
+            break
+
+    return sorted(paths)
+
+
+def migrate_files(paths: list, default_path: str, previous_path: str = None, processes: int = None,
+                  dry_run: bool = False, report=None, sparse: bool = None) -> dict:
+    """
+    :param report: called with (path, counts, error) as each file finishes
+    :param sparse: see SettingsMigration
+    :return: totals, files per second and the failed files
+    """
+    # fail on a missing default here, not in every worker
+    settings.SettingsMigration.load(default_path, previous_path, sparse=sparse)
+
+    processes = max(1, min(processes or os.cpu_count() or 1, len(paths) or 1))
+    # a few chunks per process, big enough that sending paths isn't the bottleneck for small files
+    chunksize = max(1, min(64, len(paths) // (processes * 4)))
+
+    totals = {"files": len(paths), "changed": 0, "added": 0, "removed": 0, "retyped": 0}
+    failed = []
+
+    start = time.perf_counter()
+    if processes == 1:
+        init_worker(default_path, previous_path, sparse)
+        results = (migrate_worker(path, dry_run) for path in paths)
+        for result in results:
+            collect_result(result, totals, failed, report)
+    else:
+        with multiprocessing.Pool(processes, initializer=init_worker, initargs=(default_path, previous_path, sparse)) as pool:
+            results = pool.imap_unordered(migrate_worker_args, [(path, dry_run) for path in paths], chunksize)
+            for result in results:
+                collect_result(result, totals, failed, report)
+    seconds = time.perf_counter() - start
+
+    totals.update({"seconds": seconds, "files per second": len(paths) / seconds if seconds else 0.0,
+                   "processes": processes, "failed": failed})
+    return totals
+
+
+def migrate_worker_args(args: tuple) -> tuple:
+    return migrate_worker(*args)
+
+
+def collect_result(result: tuple, totals: dict, failed: list, report=None):
+    path, counts, error = result
+    if error is not None:
+        failed.append((path, error))
+    else:
+        if any(counts.values()):
+            totals["changed"] += 1
+        for name, count in counts.items():
+            totals[name] += count
+
+    if report is not None:
+        report(path, counts, error)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="apply a changed default settings TXT file to the user files")
+    parser.add_argument("default", help="new default settings TXT file")
+    parser.add_argument("directory", help="directory with the user settings TXT files")
+    parser.add_argument("--previous", help="default settings TXT file the user files were saved from")
+    parser.add_argument("--pattern", help="file name pattern of the user files, <default name>_*.txt if not given")
+    parser.add_argument("--recursive", action="store_true")
+    parser.add_argument("--processes", type=int, default=None, help="worker processes, 1 per core if not given")
+    parser.add_argument("--dry-run", action="store_true", help="only print the changes")
+    parser.add_argument("--sparse", action="store_true",
+                        help="user files only keep the keys that differ from the default, nothing is added to them")
+    args = parser.parse_args()
+
+    pattern = args.pattern or os.path.splitext(os.path.basename(args.default))[0] + "_*.txt"
+    paths = find_user_files(args.directory, pattern, recursive=args.recursive, exclude=args.default)
+
+    def report(path, counts, error):
+        if error is not None:
+            print(f"FAILED {path}: {error}")
+        elif any(counts.values()):
+            print(f"{path}: +{counts['added']} -{counts['removed']} ~{counts['retyped']}")
+
+    try:
+        totals = migrate_files(paths, args.default, args.previous, processes=args.processes, dry_run=args.dry_run,
+                               report=report if args.dry_run else None, sparse=True if args.sparse else None)
+    except FileNotFoundError as error:
+        print(error)
+        sys.exit(1)
+
+    for path, error in totals["failed"]:
+        if not args.dry_run:
+            print(f"FAILED {path}: {error}")
+
+    verb = "would change" if args.dry_run else "changed"
+    print(f"{totals['files']} files, {verb} {totals['changed']}: {totals['added']} keys added, "
+          f"{totals['removed']} removed, {totals['retyped']} retyped")
+    print(f"{totals['seconds']:.2f} s, {totals['files per second']:.0f} files/s on {totals['processes']} processes")
+
+    if totals["failed"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,2484 @@
+from typing import Dict, Union, List
+
+from PyQt5.QtCore import Qt, QTimer, QObject, QEvent, QFileSystemWatcher, pyqtSignal
+from PyQt5.QtGui import QFont
+from PyQt5 import sip
+from PyQt5.QtWidgets import QWidget, QLabel, QHBoxLayout, QPushButton, QVBoxLayout, QLayout, QLineEdit, QSpinBox, \
+    QDoubleSpinBox, QCheckBox, QComboBox, QGroupBox, QRadioButton, QFrame, QScrollArea, QButtonGroup
+from bisect import bisect_left, bisect_right
+from collections import ChainMap
+import itertools
+import os
+import threading
+import weakref
+import time
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+from Option_Settings_Auto import SettingsModel, LayeredSettingsModel, read_layers, KeyIndex, load_options, \
+    getOptions, format_value, default_user_path, is_sqlite_path, write_settings_updates, journal_settings_updates, \
+    JOURNAL_SUFFIX, DEFAULT_LIMITS, SettingsSchema, load_schema, SettingsProfiles, InstrumentationReport, \
+    active_report, deliver_report, instrumented, timed
+
+
+"""
+Widget side of Option_Settings_Auto, builds the UI elements for a TXT File and saves them back
+
+Importing Option_Settings_Auto doesn't load this module (or PyQt5), its functions are loaded from here on first use
+
+"""
+
+
+def iter_elements(widget_layout: [QWidget, QLayout], types: tuple = None):
+    """
+    generator over everything in a layout tree, in the same order getAllElements() collects them, walked with a
+    stack instead of recursion so deep trees can't hit the recursion limit
+    :param widget_layout: Qwidget or layout
+    :param types: only yield objects that are instances of these classes, e.g. (QSpinBox, QLineEdit)
+    """
+    if isinstance(widget_layout, QWidget):
+        layout = widget_layout.layout()
+    else:
+        layout = widget_layout
+
+    if layout is None:
+        return
+
+    stack = [layout]
+    while stack:
+        element = stack.pop()
+        if types is None or isinstance(element, types):
+            yield element
+
+        children = []
+        if isinstance(element, QLayout):
+            for i in range(element.count()):
+                item = element.itemAt(i)
+                if item:
+                    children.append(item.widget() or item.layout() or item)
+
+        elif isinstance(element, QWidget):
+            lay = element.layout()
+            if lay:
+                children.append(lay)
+
+        # reversed so the first child is walked next
+        stack.extend(reversed(children))
+
+
+class ElementCache(QObject):
+    """
+    Cached iter_elements() result of a root widget, dropped when a child gets added to or removed from any container
+    (widget with a layout, or layout) in the tree
+
+    Only containers are watched, leaf widgets never get tree children and a filter on them would run on every
+    paint/mouse event
+    """
+    def __init__(self, root: QWidget):
+        super().__init__(root)
+        self.root = root
+        self.all_elements = None
+        self.filtered = {}
+        # the objects themselves, ids of deleted widgets get reused by new ones
+        self.watched = weakref.WeakSet()
+
+    def elements(self, types: tuple = None) -> list:
+        if self.all_elements is None:
+            self.all_elements = list(iter_elements(self.root))
+            containers = [self.root] + [element for element in self.all_elements if isinstance(element, QLayout) or
+                                        (isinstance(element, QWidget) and element.layout() is not None)]
+            for element in containers:
+                if element not in self.watched:
+                    element.installEventFilter(self)
+                    self.watched.add(element)
+
+        if types is None:
+            return self.all_elements
+
+        if types not in self.filtered:
+            self.filtered[types] = [element for element in self.all_elements if isinstance(element, types)]
+        return self.filtered[types]
+
+    def invalidate(self):
+        self.all_elements = None
+        self.filtered.clear()
+
+    def eventFilter(self, obj, event) -> bool:
+        if event.type() in (QEvent.ChildAdded, QEvent.ChildRemoved):
+            self.invalidate()
+        return False
+
+
+def find_elements(widget_layout: [QWidget, QLayout], types: tuple = None, cached: bool = False) -> list:
+    """
+    :param widget_layout: Qwidget or layout
+    :param types: only return objects that are instances of these classes, e.g. (QSpinBox, QLineEdit)
+    :param cached: keep the result on the widget until its children change, repeat calls then cost nothing
+    :return: list of the layouts/widgets/layout items in the tree
+    """
+    if not cached or not isinstance(widget_layout, QWidget):
+        return list(iter_elements(widget_layout, types))
+
+    cache = getattr(widget_layout, "element_cache", None)
+    if cache is None:
+        cache = ElementCache(widget_layout)
+        widget_layout.element_cache = cache
+
+    # list is shared with the cache
+    return list(cache.elements(types))
+
+
+def getAllElements(widget_layout: [QWidget, QLayout], types: tuple = None, cached: bool = False) -> dict:
+    """
+    function that gets all items in a layout and passes into a dict
+    :param element: Qwidget or layout
+    :param types: only include objects that are instances of these classes
+    :param cached: reuse the walk of the tree until the widget's children change, see find_elements()
+    :return:  return as a dict, all layout/widget/layout items object names as keys with the values as the layout/widget/layout item
+    """
+    element_items = {}
+
+    for element in find_elements(widget_layout, types=types, cached=cached):
+        try:
+            name = element.objectName()
+        except AttributeError:
+            # layout items (spacers) have no object name
+            name = ""
+
+        if name.strip() == "":
+            element_items[str(hex(id(element)))] = element
+        else:
+            element_items[name] = element
+
+    return element_items
+
+
+class SettingsEntry:
+    """
+    One settings key in a SettingsRegistry
+
+    kind is one of the objectName suffixes the widgets are created with:
+    "edit", "spin", "check", "list" (several edits/spins), "radio", "combo"
+
+    value holds the parsed value while the row has no widgets yet (lazy mode)
+
+    row is the element return_UI_element() created for the key and column the layout (or LazyColumn) it sits in,
+    so a single row can be inserted/removed without rebuilding the panel
+    """
+    __slots__ = ("key", "kind", "widgets", "value", "row", "column")
+
+    def __init__(self, key: str, kind: str = None, widgets: list = None, value=None):
+        self.key = key
+        self.kind = kind
+        self.widgets = widgets or []
+        self.value = value
+        self.row = None
+        self.column = None
+
+    def current_value(self) -> [tuple, str, int, float, list, bool]:
+        """
+        :return: current widget values with the datatypes options_affix_datatypes() gives them
+        """
+        widgets = self.widgets
+        if not widgets:
+            return self.value
+
+        if self.kind == "check":
+            return widgets[0].isChecked()
+
+        if self.kind == "radio":
+            total_items = []
+            for radio in widgets:
+                total_items.append(radio.text())
+                if radio.isChecked():
+                    total_items.append(str(True))
+            return tuple(total_items)
+
+        if self.kind == "combo":
+            combo = widgets[0]
+            total_items = [combo.itemText(i) for i in range(combo.count())]
+            total_items.append(str(combo.currentIndex()))
+            return [total_items]
+
+        # edit / spin / list, QLineEdit uses text(), spin boxes use value()
+        total_items = [w.text() if isinstance(w, QLineEdit) else w.value() for w in widgets]
+        return total_items if self.kind == "list" else total_items[0]
+
+    def text(self) -> str:
+        """
+        :return: current widget values formatted the way they are written back to the TXT file
+        """
+        return format_value(self.current_value())
+
+    def apply(self, value: [tuple, str, int, float, list]):
+        """
+        sets the widgets to a value as returned by options_affix_datatypes()
+        """
+        self.value = value
+        widgets = self.widgets
+
+        if not widgets:
+            return
+
+        if self.kind == "check":
+            widgets[0].setCheckState(Qt.Checked if value == True else Qt.Unchecked)
+
+        elif self.kind == "radio":
+            check_index = radio_check_index(value)
+            if check_index < len(widgets):
+                widgets[check_index].setChecked(True)
+
+        elif self.kind == "combo":
+            if value[0][-1].isdigit():
+                widgets[0].setCurrentIndex(int(value[0][-1]))
+
+        else:
+            values = list_widget_items(value) if self.kind == "list" else [value]
+            for widget, item in zip(widgets, values):
+                if isinstance(widget, QLineEdit):
+                    widget.setText(str(item))
+                elif isinstance(item, (int, float)):
+                    # QSpinBox only takes int
+                    widget.setValue(type(widget.value())(item))
+
+    def matches(self, value: [tuple, str, int, float, list]) -> bool:
+        """
+        :return: True if apply(value) wouldn't change anything
+        """
+        widgets = self.widgets
+        if not widgets:
+            return self.value == value
+
+        if self.kind == "check":
+            return widgets[0].isChecked() == (value == True)
+
+        if self.kind == "radio":
+            check_index = radio_check_index(value)
+            return check_index >= len(widgets) or widgets[check_index].isChecked()
+
+        if self.kind == "combo":
+            return not value[0][-1].isdigit() or widgets[0].currentIndex() == int(value[0][-1])
+
+        values = list_widget_items(value) if self.kind == "list" else [value]
+        for widget, item in zip(widgets, values):
+            if isinstance(widget, QLineEdit):
+                if widget.text() != str(item):
+                    return False
+            elif isinstance(item, (int, float)) and widget.value() != item:
+                return False
+
+        return True
+
+
+class SettingsRegistry(QObject):
+    """
+    Index of settings key -> SettingsEntry, filled by return_UI_element() while create_options_UI() creates
+    the widgets, so save_settings()/default_settings() do 1 lookup per key instead of scanning every widget
+
+    With track_changes the widgets' change signals add their key to dirty, so a save only writes the changed keys.
+    Without it every key counts as changed
+
+    The registry keeps its SettingsModel in step with the widgets, dirty is the model's dirty set
+    """
+    # keys whose value changed, once per widget edit or once for a whole apply_values() batch
+    settings_changed = pyqtSignal(list)
+    # SchemaViolations of a save_settings() that wrote nothing because of them
+    validation_failed = pyqtSignal(list)
+
+    # change signal connected for each widget type
+    CHANGE_SIGNALS = {"QLineEdit": "textChanged", "QSpinBox": "valueChanged", "QDoubleSpinBox": "valueChanged",
+                      "QCheckBox": "stateChanged", "QRadioButton": "toggled", "QComboBox": "currentIndexChanged"}
+
+    def __init__(self, track_changes: bool = True, model: SettingsModel = None):
+        super().__init__()
+        self.entries = {}
+        self.track_changes = track_changes
+        self.model = model if model is not None else SettingsModel()
+        self.dirty = self.model.dirty
+        self.model.bind(self.model_changed)
+        # formats the panel was built with, for rows created later
+        self.key_font = None
+        self.inner_format = None
+        # rows of a search panel are wrapped in a SettingsRow
+        self.row_containers = False
+        # WidgetPool rows take their widgets from, None creates new ones
+        self.pool = None
+
+    def register(self, key: str, kind: str, widgets: list) -> SettingsEntry:
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = SettingsEntry(key, kind, widgets)
+            self.entries[key] = entry
+        else:
+            entry.kind = kind
+            entry.widgets = widgets
+
+        if self.track_changes:
+            for widget in widgets:
+                signal = getattr(widget, self.CHANGE_SIGNALS[type(widget).__name__])
+                signal.connect(lambda *args, key=key: self.mark_changed(key))
+
+        return entry
+
+    def register_value(self, key: str, value) -> SettingsEntry:
+        # row that has no widgets yet, save_settings() writes the value as is until it gets materialized
+        entry = SettingsEntry(key, value=value)
+        self.entries[key] = entry
+        return entry
+
+    def remove(self, key: str) -> Union[SettingsEntry, None]:
+        # key dropped from the file, forget it everywhere, the row itself is removed by remove_setting_row()
+        self.model.values.pop(key, None)
+        self.dirty.discard(key)
+        return self.entries.pop(key, None)
+
+    def mark_changed(self, key: str):
+        # widget edited, read back just its own value into the model
+        self.model.values[key] = self.entries[key].current_value()
+        self.dirty.add(key)
+        self.settings_changed.emit([key])
+
+    def model_changed(self, key: str, value):
+        # SettingsModel.set() from code, show it in the widgets without feeding it back through mark_changed
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+
+        for widget in entry.widgets:
+            widget.blockSignals(True)
+        try:
+            entry.apply(value)
+        finally:
+            for widget in entry.widgets:
+                widget.blockSignals(False)
+
+        self.settings_changed.emit([key])
+
+    def text(self, key: str) -> str:
+        """
+        :return: value of key formatted for the TXT file, from the model while the widgets are tracked
+        """
+        if self.track_changes and key in self.model:
+            return self.model.text(key)
+        return self.entries[key].text()
+
+    def apply(self, key: str, value):
+        """
+        sets key to a value as returned by options_affix_datatypes(), rows without widgets are marked dirty here
+        since there is no signal for them
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return
+
+        if not entry.widgets and entry.value != value:
+            self.dirty.add(key)
+            self.settings_changed.emit([key])
+        entry.apply(value)
+        self.model.values[key] = value
+
+    def apply_values(self, values: dict, options_widget: QWidget = None, mark_dirty: bool = True) -> list:
+        """
+        sets only the keys whose current value differs from values, with the widgets' signals blocked and the panel's
+        updates suspended, then emits settings_changed once for all of them
+        :param values: key: value as returned by options_affix_datatypes()
+        :param options_widget: panel to suspend repaints on while the widgets change
+        :param mark_dirty: False when values are what the file already holds (reloaded from disk)
+        :return: changed keys
+        """
+        changed = [key for key, value in values.items() if key in self.entries and not self.entries[key].matches(value)]
+        if not changed:
+            return changed
+
+        if options_widget is not None:
+            options_widget.setUpdatesEnabled(False)
+        try:
+            for key in changed:
+                entry = self.entries[key]
+                for widget in entry.widgets:
+                    widget.blockSignals(True)
+                try:
+                    entry.apply(values[key])
+                finally:
+                    for widget in entry.widgets:
+                        widget.blockSignals(False)
+                self.model.values[key] = values[key]
+                if mark_dirty:
+                    self.dirty.add(key)
+        finally:
+            if options_widget is not None:
+                options_widget.setUpdatesEnabled(True)
+
+        self.settings_changed.emit(changed)
+        return changed
+
+    def dirty_keys(self) -> set:
+        if not self.track_changes:
+            return set(self.entries)
+        return set(self.dirty)
+
+    def is_dirty(self) -> bool:
+        return bool(self.dirty) or (not self.track_changes and bool(self.entries))
+
+    def clear_dirty(self, keys=None):
+        if keys is None:
+            self.dirty.clear()
+        else:
+            self.dirty.difference_update(keys)
+
+    def get(self, key: str) -> Union[SettingsEntry, None]:
+        return self.entries.get(key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+class WidgetPool:
+    """
+    Idle widgets of the types create_options_UI() builds, taken back from the rows of a panel it rebuilds for another
+    settings file or profile (create_options_UI(reuse=panel)), so the new rows reuse them by type instead of deleting
+    and allocating every widget again. Idle widgets stay children of the panel (radio buttons of their group box), a
+    widget put back into a layout of the same parent isn't reparented, which costs about as much as creating it.
+    Only the widgets the new rows need beyond the pool are created and the ones left over are deleted once it's built,
+    a lazy panel keeps up to 1 batch per column of each type for the rows it creates later
+
+    Idle widgets have their signals disconnected and their per-row state (items, checked state, font) reset
+    """
+    POOLED_TYPES = (QLabel, QLineEdit, QSpinBox, QDoubleSpinBox, QCheckBox, QComboBox, QGroupBox, QRadioButton)
+
+    # signals disconnected when a widget goes idle, the registry's change signals and what programs commonly use
+    RESET_SIGNALS = {QLabel: ("linkActivated",),
+                     QLineEdit: ("textChanged", "textEdited", "editingFinished", "returnPressed"),
+                     QSpinBox: ("valueChanged", "editingFinished"),
+                     QDoubleSpinBox: ("valueChanged", "editingFinished"),
+                     QCheckBox: ("stateChanged", "toggled", "clicked"),
+                     QComboBox: ("currentIndexChanged", "currentTextChanged", "activated"),
+                     QGroupBox: ("toggled", "clicked"),
+                     QRadioButton: ("toggled", "clicked")}
+
+    def __init__(self):
+        self.idle = {widget_type: [] for widget_type in self.POOLED_TYPES if widget_type != QRadioButton}
+        # group box -> its idle radio buttons, a group box reused for another radio row keeps its own buttons first
+        self.radios = {}
+        # non-exclusive, only holds the check box whose state is being set
+        self.check_group = QButtonGroup()
+        self.check_group.setExclusive(False)
+        self.hits = 0
+        self.misses = 0
+        self.released = 0
+        self.deleted = 0
+
+    def take(self, widget_type: type, parent: QWidget = None) -> QWidget:
+        """
+        :param parent: group box a radio button is taken for
+        :return: idle widget of widget_type, a new one if there is none
+        """
+        if widget_type == QRadioButton:
+            idle = self.radios.get(parent) or next((radios for radios in self.radios.values() if radios), None)
+        else:
+            idle = self.idle[widget_type]
+
+        report = active_report()
+        if idle:
+            self.hits += 1
+            if report is not None:
+                report.count("pool hits")
+            widget = idle.pop()
+            # left over by a lazy panel or hidden by a search
+            if widget.isHidden():
+                widget.show()
+            return widget
+
+        self.misses += 1
+        if report is not None:
+            report.count("pool misses")
+        return widget_type()
+
+    def set_check_state(self, check: QCheckBox, state: Qt.CheckState):
+        # unchecking a button without a group looks for the checked one among all buttons of its parent, for a reused
+        # check box every button on the panel, a group answers that without a search
+        self.check_group.addButton(check)
+        check.setCheckState(state)
+        self.check_group.removeButton(check)
+
+    def release(self, widget: QWidget, panel: QWidget):
+        widget_type = type(widget)
+        if widget_type not in self.POOLED_TYPES:
+            return
+
+        for name in self.RESET_SIGNALS[widget_type]:
+            try:
+                getattr(widget, name).disconnect()
+            except TypeError:
+                # nothing connected
+                pass
+
+        if widget_type == QRadioButton:
+            # auto-exclusive radio buttons can't be unchecked directly
+            widget.setAutoExclusive(False)
+            widget.setChecked(False)
+            widget.setAutoExclusive(True)
+            self.radios.setdefault(widget.parentWidget(), []).append(widget)
+        else:
+            if widget_type == QComboBox:
+                widget.clear()
+            elif widget_type == QGroupBox and widget.layout() is not None:
+                # a group box can't get a new layout while it has one, deleting it leaves its widgets alone
+                sip.delete(widget.layout())
+            # rows of lazy columns sit in their scroll areas
+            if widget.parentWidget() is not panel:
+                widget.setParent(panel)
+            self.idle[widget_type].append(widget)
+
+        self.released += 1
+
+    def release_panel(self, panel: QWidget):
+        """
+        takes back the widgets of every row of a create_options_UI() panel and deletes everything else on it (layouts,
+        search box, buttons, watcher), the panel is left empty with its registry detached from its model
+        """
+        panel.setUpdatesEnabled(False)
+        watcher = getattr(panel, "settings_watcher", None)
+        if watcher is not None:
+            watcher.stop()
+
+        # rows of lazy columns aren't created anymore
+        for column in getattr(panel, "lazy_columns", None) or []:
+            bar = column.scroll.verticalScrollBar()
+            bar.valueChanged.disconnect(column.fill_view)
+            bar.rangeChanged.disconnect(column.fill_view)
+
+        registry = getattr(panel, "settings_registry", None)
+        if registry is not None:
+            # the widgets inside a search panel's SettingsRow containers
+            rows = [(entry.widgets, [] if entry.row is None else
+                     row_widgets(entry.row.layout() if isinstance(entry.row, SettingsRow) else entry.row))
+                    for entry in registry.entries.values()]
+
+            # layouts go first, a widget taken out of a layout otherwise searches every layout of its parent
+            parents = {widget.parentWidget() for widgets, row in rows for widget in row}
+            for parent in parents:
+                if parent is not None and parent is not panel and parent.layout() is not None:
+                    sip.delete(parent.layout())
+
+            # a row's widgets and the entry's widgets overlap
+            released = set()
+            for widgets, row in rows:
+                # radio buttons before the group box holding them
+                for widget in itertools.chain(widgets, row):
+                    if widget not in released:
+                        released.add(widget)
+                        self.release(widget, panel)
+
+            for entry in registry.entries.values():
+                entry.widgets = []
+                entry.row = None
+
+            if registry.model_changed in registry.model.listeners:
+                registry.model.listeners.remove(registry.model_changed)
+            registry.entries.clear()
+
+        if panel.layout() is not None:
+            sip.delete(panel.layout())
+
+        # search box, buttons, separators, scroll areas of lazy columns, watcher/search/first show objects
+        pooled = set(itertools.chain(*self.idle.values()))
+        for child in panel.children():
+            if child not in pooled:
+                if child.isWidgetType():
+                    child.hide()
+                child.deleteLater()
+
+        panel.settings_search = None
+        panel.settings_watcher = None
+
+    def hide_idle(self):
+        """
+        hides the idle widgets, for a panel whose rows are created later (lazy columns) keeping them, trim() them to
+        what those rows are likely to need first
+        """
+        for widget in itertools.chain(*self.idle.values(), *self.radios.values()):
+            widget.hide()
+
+    def trim(self, max_idle: int = 0):
+        """
+        deletes idle widgets beyond max_idle per type
+        """
+        radios = [radio for radios in self.radios.values() for radio in radios]
+        while len(radios) > max_idle:
+            radio = radios.pop()
+            self.radios[radio.parentWidget()].remove(radio)
+            self.delete(radio)
+
+        for idle in self.idle.values():
+            while len(idle) > max_idle:
+                widget = idle.pop()
+                # radio buttons go with their group box
+                self.deleted += len(self.radios.pop(widget, []))
+                self.delete(widget)
+
+        self.radios = {group: radios for group, radios in self.radios.items() if radios}
+
+    def delete(self, widget: QWidget):
+        widget.hide()
+        widget.deleteLater()
+        self.deleted += 1
+
+    @property
+    def size(self) -> int:
+        return sum(len(idle) for idle in itertools.chain(self.idle.values(), self.radios.values()))
+
+    @property
+    def hit_rate(self) -> float:
+        taken = self.hits + self.misses
+        return self.hits / taken if taken else 0.0
+
+    def stats(self) -> dict:
+        idle = {widget_type.__name__: len(widgets) for widget_type, widgets in self.idle.items()}
+        idle["QRadioButton"] = sum(len(radios) for radios in self.radios.values())
+        return {"size": self.size, "hits": self.hits, "misses": self.misses, "hit rate": self.hit_rate,
+                "released": self.released, "deleted": self.deleted, "idle": idle}
+
+
+def new_widget(widget_type: type, pool: WidgetPool = None, parent: QWidget = None) -> QWidget:
+    """
+    :param parent: group box of a radio button
+    """
+    return pool.take(widget_type, parent) if pool is not None else widget_type()
+
+
+def radio_check_index(value: tuple) -> int:
+    # TRUE in the tuple marks the radiobutton before it as checked
+    check_index = 0
+    position = 0
+    for i in value:
+        if i.upper() == "TRUE":
+            check_index = position - 1
+        else:
+            position += 1
+
+    return max(check_index, 0)
+
+
+def list_widget_items(value: list) -> list:
+    # only int/float/str list items get a widget in return_UI_element()
+    return [i for i in value if type(i) in (int, float, str)]
+
+
+def settings_registry(options_widget: QWidget, keys=None) -> SettingsRegistry:
+    """
+    :param options_widget: QWidget returned by create_options_UI() or any widget holding the same named elements
+    :param keys: keys to look up when the widget has no registry attached
+    :return: registry attached by create_options_UI(), otherwise one built from exact objectName matches
+    """
+    registry = getattr(options_widget, "settings_registry", None)
+    if registry is not None:
+        return registry
+
+    registry = SettingsRegistry(track_changes=False)
+    elements = getAllElements(options_widget)
+
+    for key in keys or ():
+        for kind in ("edit", "spin", "check", "combo"):
+            obj = elements.get(key + "_" + kind)
+            if obj is not None:
+                registry.register(key, kind, [obj])
+                break
+        else:
+            group = elements.get(key + "_group")
+            if group is not None:
+                registry.register(key, "radio", group.findChildren(QRadioButton))
+                continue
+
+            total = []
+            index = 0
+            while True:
+                obj = elements.get(key + str(index) + "_spin") or elements.get(key + str(index) + "_edit")
+                if obj is None:
+                    break
+                total.append(obj)
+                index += 1
+            if total:
+                registry.register(key, "list", total)
+
+    return registry
+
+
+def is_dirty(options_widget: QWidget) -> bool:
+    """
+    :param options_widget: QWidget returned by create_options_UI()
+    :return: True if any setting changed since the panel was created or last saved
+    """
+    registry = getattr(options_widget, "settings_registry", None)
+    return registry is None or registry.is_dirty()
+
+
+class LazyColumn:
+    """
+    Column of a lazy create_options_UI() panel. Rows are kept as parsed values in the registry and only get created
+    through return_UI_element() once they scroll into view, so startup cost doesn't grow with the file size
+    """
+    def __init__(self, keys: list, registry: SettingsRegistry, key_font: QFont() = None, inner_format: dict = None,
+                 outer_format: dict = None, batch_size: int = 50):
+        self.keys = keys
+        self.registry = registry
+        self.key_font = key_font
+        self.inner_format = inner_format
+        self.batch_size = batch_size
+        # rows of the keys in front of next_index all exist, keys after it whose rows a search had created
+        self.next_index = 0
+        self.created = set()
+        # keys a SettingsSearch lets through, None shows every row
+        self.visible_keys = None
+
+        # rows get inserted between the front and back stretch/spacing of the outer format
+        content = QWidget()
+        self.layout = create_layout(outer_format["front_end_stretch"], outer_format["spacing"], layout=QVBoxLayout())
+        self.front_index = self.insert_index = self.layout.count()
+        create_layout(outer_format["spacing"], outer_format["backend_stretch"], layout=self.layout)
+        content.setLayout(self.layout)
+
+        self.scroll = QScrollArea()
+        self.scroll.setWidgetResizable(True)
+        self.scroll.setWidget(content)
+
+        bar = self.scroll.verticalScrollBar()
+        bar.valueChanged.connect(self.fill_view)
+        bar.rangeChanged.connect(self.fill_view)
+
+        self.materialize(batch_size)
+
+    def materialize(self, count: int = None) -> int:
+        """
+        creates the widgets for the next count rows, all remaining rows if count is None. While a search filters the
+        column only the rows of visible_keys are created, the hidden ones have no height and would all get created
+        to fill the view
+        :return: number of rows created
+        """
+        created = 0
+        index = self.insert_index
+        for position in range(self.next_index, len(self.keys)):
+            if count is not None and created >= count:
+                break
+
+            key = self.keys[position]
+            if key not in self.created:
+                if self.visible_keys is not None and key not in self.visible_keys:
+                    continue
+                self.create_row(key, index)
+                self.created.add(key)
+                created += 1
+            if self.registry.get(key).row:
+                index += 1
+
+            # no key without a row in front of this one
+            if position == self.next_index:
+                self.next_index += 1
+                self.insert_index = index
+                self.created.discard(key)
+
+        return created
+
+    def create_row(self, key: str, index: int):
+        entry = self.registry.get(key)
+        element = return_UI_element(key, entry.value, key_font=self.key_font, inner_format=self.inner_format,
+                                    registry=self.registry)
+        entry.row = element
+        if element:
+            insert_element(self.layout, index, element)
+            if self.visible_keys is not None and key not in self.visible_keys:
+                set_row_visible(element, False)
+
+    def insert_key(self, key: str, after_key: str = None):
+        """
+        adds key's row after after_key (at the front if None), created right away if that part of the column
+        already has its widgets
+        """
+        position = self.keys.index(after_key) + 1 if after_key in self.keys else 0
+        self.keys.insert(position, key)
+        self.registry.get(key).column = self
+
+        if position < self.next_index:
+            self.next_index += 1
+            rows_before = [self.registry.get(k).row for k in self.keys[:position] if self.registry.get(k).row]
+            index = self.layout.indexOf(rows_before[-1]) + 1 if rows_before else self.front_index
+            self.create_row(key, index)
+            if self.registry.get(key).row:
+                self.insert_index += 1
+
+    def remove_key(self, key: str, row: Union[QWidget, QLayout, None]):
+        position = self.keys.index(key)
+        del self.keys[position]
+
+        if position < self.next_index:
+            self.next_index -= 1
+            if row:
+                remove_element(self.layout, row)
+                self.insert_index -= 1
+        elif key in self.created:
+            self.created.discard(key)
+            if row:
+                remove_element(self.layout, row)
+
+    def fill_view(self, *args):
+        # keep about 1 page of rows created below the visible area
+        if self.next_index >= len(self.keys):
+            return
+
+        bar = self.scroll.verticalScrollBar()
+        if bar.maximum() - bar.value() <= self.scroll.viewport().height():
+            # layout is updated on the event loop, check again once the new rows have a size. Nothing created means
+            # every row a search lets through exists
+            if self.materialize(self.batch_size):
+                QTimer.singleShot(0, self.fill_view)
+
+
+class BackgroundSettingsIO(QObject):
+    """
+    Runs settings file reads and writes on worker threads so the GUI thread never waits on disk I/O
+
+    Saves get an immutable snapshot of key: value text taken on the GUI thread. Saves for a path that come in while
+    that path is still being written are merged and written together once the current write is done
+    """
+    # path written
+    saved = pyqtSignal(str)
+    # path, error message
+    failed = pyqtSignal(str, str)
+
+    # internal, delivers results back on the GUI thread
+    load_finished = pyqtSignal(object, object)
+    save_failed = pyqtSignal(object)
+
+    def __init__(self, max_workers: int = 2):
+        super().__init__()
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="settings_io")
+        self.lock = threading.Lock()
+        # path -> (merged key: value text, [(dirty set, keys)], default path)
+        self.pending = {}
+        self.writing = set()
+        # futures of the submitted loads/writes that haven't finished yet, for wait()
+        self.futures = set()
+
+        self.load_finished.connect(self.deliver_load)
+        self.save_failed.connect(self.restore_dirty)
+
+    def save(self, user_path: str, updates: Dict[str, str], registry: SettingsRegistry = None,
+             default_path: str = None):
+        """
+        :param updates: key: value text to write, as returned by SettingsEntry.text()
+        :param registry: keys get marked dirty again in it if the write fails, in the dirty set of the model it shows
+                         now, a profile switched away from before the write fails still gets its own keys back
+        :param default_path: file copied to user_path first if user_path doesn't exist yet
+        """
+        dirty = registry.dirty if registry is not None else None
+        with self.lock:
+            merged, owners, pending_default = self.pending.get(user_path, ({}, [], None))
+            merged.update(updates)
+            owners.append((dirty, list(updates)))
+            self.pending[user_path] = (merged, owners, pending_default or default_path)
+
+            # the running write for this path picks up the merged updates when it's done
+            if user_path in self.writing:
+                return
+            self.writing.add(user_path)
+
+        self.submit(self.write_pending, user_path)
+
+    def submit(self, function, *args):
+        future = self.executor.submit(function, *args)
+        with self.lock:
+            self.futures.add(future)
+        future.add_done_callback(self.forget_future)
+
+    def forget_future(self, future):
+        with self.lock:
+            self.futures.discard(future)
+
+    def write_pending(self, user_path: str):
+        finished = False
+        try:
+            while True:
+                with self.lock:
+                    pending = self.pending.pop(user_path, None)
+                    if pending is None:
+                        self.writing.discard(user_path)
+                        finished = True
+                        return
+
+                updates, owners, default_path = pending
+                try:
+                    write_settings_updates(user_path, updates, default_path=default_path)
+                except Exception as error:
+                    # not only OSError (a bad encoding, ...), nobody reads the executor's future
+                    self.save_failed.emit(owners)
+                    self.failed.emit(user_path, str(error))
+                else:
+                    self.saved.emit(user_path)
+        finally:
+            # something escaped the loop, later saves to the path must not wait for this write forever
+            if not finished:
+                with self.lock:
+                    self.writing.discard(user_path)
+                    pending = self.pending.pop(user_path, None)
+                if pending is not None:
+                    self.save_failed.emit(pending[1])
+
+    def load(self, path: str, callback, schema: SettingsSchema = None):
+        """
+        parses path with load_options() on a worker thread, callback gets the result on the GUI thread,
+        failed is emitted instead if it raises
+        :param schema: SettingsSchema, values get the datatype it declares
+        """
+        self.submit(self.run_load, path, callback, schema)
+
+    def run_load(self, path: str, callback, schema: SettingsSchema = None):
+        try:
+            result = load_options(path, schema=schema)
+        except Exception as error:
+            self.failed.emit(path, str(error))
+        else:
+            self.load_finished.emit(callback, result)
+
+    def deliver_load(self, callback, result):
+        callback(result)
+
+    def restore_dirty(self, owners: list):
+        for dirty, keys in owners:
+            if dirty is not None:
+                dirty.update(keys)
+
+    def wait(self):
+        """
+        blocks until every queued load/save is done, for shutdown or tests. Load callbacks run on the GUI thread
+        once it processes events again
+        """
+        while True:
+            with self.lock:
+                futures = set(self.futures)
+            if not futures:
+                return
+            # saves merged into a running write are part of its future
+            wait_futures(futures)
+
+
+background_settings_io = None
+
+
+def background_io() -> BackgroundSettingsIO:
+    """
+    :return: shared BackgroundSettingsIO used by background saves/loads, connect to its saved/failed signals
+    """
+    global background_settings_io
+    if background_settings_io is None:
+        background_settings_io = BackgroundSettingsIO()
+
+    return background_settings_io
+
+
+def take_element(layout: QLayout, element: [QWidget, QLayout]):
+    # out of the layout without deleting it, so it can be inserted somewhere else
+    if isinstance(element, QWidget):
+        layout.removeWidget(element)
+    else:
+        layout.removeItem(element)
+        element.setParent(None)
+
+
+def insert_element(layout: QLayout, index: int, element: [QWidget, QLayout]):
+    if isinstance(element, QWidget):
+        layout.insertWidget(index, element)
+    else:
+        layout.insertLayout(index, element)
+
+
+def remove_element(layout: QLayout, element: [QWidget, QLayout]):
+    """
+    takes a row created by return_UI_element() out of layout and deletes it with all its widgets
+    """
+    take_element(layout, element)
+    if isinstance(element, QWidget):
+        element.hide()
+        element.deleteLater()
+        return
+
+    # stack instead of recursion, same as iter_elements()
+    stack = [element]
+    while stack:
+        current = stack.pop()
+        while current.count():
+            item = current.takeAt(0)
+            if item.widget() is not None:
+                item.widget().hide()
+                item.widget().deleteLater()
+            elif item.layout() is not None:
+                stack.append(item.layout())
+        current.deleteLater()
+
+
+def insert_setting_row(registry: SettingsRegistry, key: str, value, after_key: str = None, before_key: str = None):
+    """
+    adds a row for a new key next to an existing one, after after_key or else before before_key
+    """
+    registry.model.values[key] = value
+    entry = registry.register_value(key, value)
+
+    after = registry.get(after_key)
+    before = registry.get(before_key)
+
+    if after is not None and isinstance(after.column, LazyColumn):
+        after.column.insert_key(key, after_key)
+        return
+    if before is not None and isinstance(before.column, LazyColumn):
+        keys = before.column.keys
+        position = keys.index(before_key)
+        before.column.insert_key(key, keys[position - 1] if position else None)
+        return
+
+    # rows of a built panel need an anchor row to be placed next to
+    anchor = after if after is not None and after.row else before
+    if anchor is None or not anchor.row:
+        return
+
+    element = return_UI_element(key, value, key_font=registry.key_font,
+                                inner_format=inner_element_format(registry.inner_format), registry=registry)
+    if registry.row_containers:
+        element = row_container(element)
+    entry.row = element
+    entry.column = anchor.column
+    if element:
+        index = anchor.column.indexOf(anchor.row)
+        insert_element(anchor.column, index + 1 if anchor is after else index, element)
+
+
+def remove_setting_row(registry: SettingsRegistry, key: str):
+    entry = registry.remove(key)
+    if entry is None or entry.column is None:
+        return
+
+    if isinstance(entry.column, LazyColumn):
+        entry.column.remove_key(key, entry.row)
+    elif entry.row:
+        remove_element(entry.column, entry.row)
+
+
+def reload_settings(options_widget: QWidget, options: dict) -> list:
+    """
+    brings a create_options_UI() panel in line with freshly parsed options, keys with unsaved edits keep them
+    :param options_widget: QWidget returned by create_options_UI()
+    :param options: key: value as returned by load_options()
+    :return: keys that changed, were added or were removed
+    """
+    registry = options_widget.settings_registry
+    current = registry.model.values
+
+    removed = [key for key in current if key not in options]
+    added = [key for key in options if key not in current]
+    changed = {key: value for key, value in options.items()
+               if key in current and key not in registry.dirty and current[key] != value}
+
+    return change_setting_rows(options_widget, options, removed, added, changed)
+
+
+# keys changed at once by a reload/profile switch above which the panel's repaints are suspended while they change
+SUSPEND_UPDATES_KEYS = 100
+
+
+def change_setting_rows(options_widget: QWidget, options: dict, removed: list, added: list, changed: dict) -> list:
+    """
+    deletes the rows of removed keys, creates rows for added keys and sets the changed ones, with repaints suspended
+    :param options: all keys in file order (key: value), added keys are placed by it
+    :return: keys that changed, were added or were removed
+    """
+    if not removed and not added and not changed:
+        return []
+
+    registry = options_widget.settings_registry
+    # resuming updates repaints the whole panel, a few changed widgets only repaint themselves
+    suspend = len(removed) + len(added) + len(changed) > SUSPEND_UPDATES_KEYS
+    if suspend:
+        options_widget.setUpdatesEnabled(False)
+    try:
+        for key in removed:
+            remove_setting_row(registry, key)
+
+        if added:
+            # anchor each new row to the key in front of it in the file, or the next one for keys at the front
+            added_keys = set(added)
+            keys = list(options)
+            for position, key in enumerate(keys):
+                if key not in added_keys:
+                    continue
+                after_key = keys[position - 1] if position else None
+                before_key = next((k for k in keys[position + 1:] if k in registry.entries), None)
+                insert_setting_row(registry, key, options[key], after_key=after_key, before_key=before_key)
+
+        changed_keys = registry.apply_values(changed, mark_dirty=False)
+    finally:
+        if suspend:
+            options_widget.setUpdatesEnabled(True)
+
+    if removed or added:
+        search = getattr(options_widget, "settings_search", None)
+        if search is not None:
+            search.rebuild(list(options))
+        registry.settings_changed.emit(removed + added)
+
+    return removed + added + changed_keys
+
+
+def switch_profile(options_widget: QWidget, profiles: SettingsProfiles, name: str) -> list:
+    """
+    binds a create_options_UI(profiles=...) panel to another profile, only the widgets of keys whose value differs
+    between the 2 profiles are set and rows are only created/deleted for keys just one of them has. Unsaved edits
+    stay with the profile they were made in (shown again when switching back) and nothing is written
+    :param options_widget: QWidget returned by create_options_UI()
+    :return: keys that changed, were added or were removed
+    """
+    registry = options_widget.settings_registry
+    current = next((profile for profile, model in profiles.models.items() if model is registry.model), None)
+    if current is None:
+        raise ValueError("the panel doesn't show a profile of profiles")
+    if name == current:
+        profiles.activate(name)
+        return []
+
+    changed, removed, added = profiles.diff(current, name)
+    model = profiles.activate(name)
+
+    # the registry follows the new profile's model, its dirty keys are that profile's unsaved edits
+    if registry.model_changed in registry.model.listeners:
+        registry.model.listeners.remove(registry.model_changed)
+    registry.model = model
+    registry.dirty = model.dirty
+    model.bind(registry.model_changed)
+    options_widget.settings_model = model
+
+    # watch the new profile's file instead, databases (sqlite: paths) aren't watched
+    watcher = getattr(options_widget, "settings_watcher", None)
+    if watcher is not None:
+        watcher.stop()
+        watcher.deleteLater()
+        options_widget.settings_watcher = None
+        if not is_sqlite_path(model.path):
+            options_widget.settings_watcher = SettingsFileWatcher(options_widget, model.path,
+                                                                  debounce=watcher.timer.interval())
+
+    keys = change_setting_rows(options_widget, model.values if added else {}, removed, added, changed)
+
+    report = active_report()
+    if report is not None:
+        report.count("profile keys applied", len(keys))
+    return keys
+
+
+def row_widgets(row: [QWidget, QLayout]) -> list:
+    # top level widgets of a row, hiding them hides the row (widgets inside them go with them)
+    if isinstance(row, QWidget):
+        return [row]
+
+    widgets = []
+    stack = [row]
+    while stack:
+        layout = stack.pop()
+        for i in range(layout.count()):
+            item = layout.itemAt(i)
+            if item.widget() is not None:
+                widgets.append(item.widget())
+            elif item.layout() is not None:
+                stack.append(item.layout())
+
+    return widgets
+
+
+class SettingsRow(QWidget):
+    """
+    Widget holding the layout of 1 row of a search panel, so the search shows/hides the row with 1 widget and the
+    layouts skip it as 1 empty item
+    """
+    def __init__(self, layout: QLayout):
+        super().__init__()
+        # a layout set on a widget gets the style's margins, nested in the column it had none
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+
+
+def row_container(element: [QWidget, QLayout, None]) -> [QWidget, None]:
+    # group box rows already are 1 widget
+    if isinstance(element, QLayout):
+        return SettingsRow(element)
+    return element
+
+
+def set_row_blocks(registry: SettingsRegistry, keys: list, elements: list) -> list:
+    """
+    puts the rows of 1 column of a search panel into blocks of SettingsSearch.BLOCK_ROWS rows
+    :return: block widgets to lay out in place of the rows, 1 empty block for a column without rows that rows
+             can be moved to
+    """
+    blocks = []
+    for start in range(0, max(len(elements), 1), SettingsSearch.BLOCK_ROWS):
+        block_elements = elements[start:start + SettingsSearch.BLOCK_ROWS]
+        layout = create_layout(*block_elements, layout=QVBoxLayout())
+        layout.setContentsMargins(0, 0, 0, 0)
+        block = QWidget()
+        block.setObjectName("settings_rows")
+        block.setLayout(layout)
+        set_row_columns(registry, keys[start:start + SettingsSearch.BLOCK_ROWS], block_elements, layout)
+        blocks.append(block)
+
+    return blocks
+
+
+def set_row_visible(row: [QWidget, QLayout], visible: bool):
+    for widget in row_widgets(row):
+        widget.setVisible(visible)
+
+
+class RowBlock:
+    # rows in 1 block widget in layout order (= file order) and their ranks in the file
+    __slots__ = ("widget", "layout", "keys", "ranks")
+
+    def __init__(self, layout: QLayout):
+        self.widget = layout.parentWidget()
+        self.layout = layout
+        self.keys = []
+        self.ranks = []
+
+
+class SearchColumn:
+    # RowBlocks of 1 column layout in layout order and the rank of the first row of each
+    __slots__ = ("layout", "blocks", "firsts")
+
+    def __init__(self, layout: QLayout):
+        self.layout = layout
+        self.blocks = []
+        self.firsts = []
+
+
+class SettingsSearch(QObject):
+    """
+    Search box of a create_options_UI(search=True) panel
+
+    The keys are indexed once (KeyIndex), every keystroke only shows/hides the rows whose visibility changes, 1
+    SettingsRow widget per row, no widgets are created or deleted. With several columns the visible rows are balanced
+    across them again by moving only the visible rows that belong in another column now, hidden rows stay where they
+    are. Lazy columns keep their split and only create the rows of matching keys, as they scroll into view
+
+    Qt's work for a shown/hidden/moved widget grows with the number of its sibling widgets, so the rows sit in blocks
+    of BLOCK_ROWS rows (set_row_blocks()) instead of all being children of the panel. A block without visible rows
+    is hidden as well
+
+    A keystroke that changes many rows doesn't block the event loop: rows are changed in steps, the rows at the top
+    of each column first, with the layout/repaint of each step in between. The rows per step follow how long the
+    last step and its layout/repaint took, to keep each turn of the event loop around TURN_SECONDS. A keystroke
+    before the last step continues from the rows changed so far, finish() changes the rest at once
+    """
+    # keys shown by the current query, once all their rows are shown
+    filtered = pyqtSignal(list)
+
+    # rows per block widget
+    BLOCK_ROWS = 100
+
+    # time 1 step of showing/hiding/moving rows plus the layout/repaint of them should take
+    TURN_SECONDS = 0.016
+    # rows changed by the first step and the range the steps are adjusted in
+    STEP_ROWS = 100
+    MIN_STEP_ROWS = 10
+    MAX_STEP_ROWS = 5000
+
+    def __init__(self, options_widget: QWidget, registry: SettingsRegistry, columns: list, mode: str = "substring",
+                 balance: bool = True):
+        """
+        :param columns: layout of each column holding the row blocks, or the panel's LazyColumns
+        :param mode: "substring" or "prefix"
+        """
+        super().__init__(options_widget)
+        self.options_widget = options_widget
+        self.registry = registry
+        self.lazy_columns = [column for column in columns if isinstance(column, LazyColumn)]
+        self.columns = [SearchColumn(column) for column in columns if not isinstance(column, LazyColumn)]
+        self.mode = mode
+        self.balance_columns = balance and len(self.columns) >= 2
+        self.query = ""
+        self.keys = []
+        # rows hidden now, and once every queued row is changed
+        self.hidden = set()
+        self.target = set()
+        # first rank of every column after the first for the current query, None if the rows have to be checked
+        self.bounds = None
+        # queued keys per column in file order and how many of them are done
+        self.pending = []
+        self.positions = []
+        # blocks whose layouts are disabled during a step
+        self.touched = set()
+        self.step_rows = self.STEP_ROWS
+        self.step_started = None
+        self.widgets = {}
+
+        self.step_timer = QTimer(self)
+        self.step_timer.setSingleShot(True)
+        self.step_timer.setInterval(0)
+        self.step_timer.timeout.connect(self.step)
+
+        # the panel grows as soon as its layout needs more room. Otherwise the layout first squeezes every block into
+        # the old height until the scroll area around it resizes the panel, laying out all rows twice per step
+        options_widget.layout().setSizeConstraint(QLayout.SetMinimumSize)
+
+        self.line = QLineEdit()
+        self.line.setObjectName("settings_search")
+        self.line.setPlaceholderText("Search settings")
+        self.line.setClearButtonEnabled(True)
+        self.line.textChanged.connect(self.filter)
+
+        self.rebuild()
+
+    def rebuild(self, keys: list = None):
+        """
+        indexes the keys again and reads which rows sit in which column, after rows were added/removed
+        :param keys: all keys in file order, the registry's order if None
+        """
+        keys = list(self.registry.entries) if keys is None else keys
+        self.index = KeyIndex(keys)
+        self.all_keys = frozenset(keys)
+        self.rank = {key: rank for rank, key in enumerate(keys)}
+        # widgets to show/hide per row, rows of lazy columns are added once they get created
+        self.widgets = {key: row_widgets(entry.row) for key, entry in self.registry.entries.items() if entry.row}
+
+        rows = {entry.row: key for key, entry in self.registry.entries.items() if entry.row}
+        self.column_of = {}
+        self.block_of = {}
+        for i, column in enumerate(self.columns):
+            column.blocks = []
+            for j in range(column.layout.count()):
+                widget = column.layout.itemAt(j).widget()
+                if widget is None or widget.objectName() != "settings_rows":
+                    continue
+
+                block = RowBlock(widget.layout())
+                for k in range(block.layout.count()):
+                    key = rows.get(block.layout.itemAt(k).widget())
+                    if key is not None:
+                        block.keys.append(key)
+                        self.column_of[key] = i
+                        self.block_of[key] = block
+                block.ranks = [self.rank[key] for key in block.keys]
+                column.blocks.append(block)
+                if not block.keys:
+                    block.widget.hide()
+
+            # an empty block sorts like the block after it, so rows only go into it if its column has no other rows
+            first = float("inf")
+            column.firsts = []
+            for block in reversed(column.blocks):
+                first = block.ranks[0] if block.ranks else first
+                column.firsts.insert(0, first)
+        self.order = sorted(self.column_of, key=self.rank.__getitem__)
+        self.order_ranks = [self.rank[key] for key in self.order]
+
+        # a column is as wide as its widest visible row, its width changing lays out every row in it again. Every
+        # block gets the width of the widest row (rows move between columns), the columns keep it while searching
+        if self.columns:
+            width = max((self.registry.get(key).row.minimumSizeHint().width() for key in self.order), default=0)
+            for column in self.columns:
+                for block in column.blocks:
+                    block.widget.setMinimumWidth(width)
+
+        # columns of a panel without balancing keep the split they were built with
+        if self.columns:
+            firsts = [column.firsts[0] for column in self.columns[1:] if column.firsts]
+        else:
+            firsts = [self.rank[column.keys[0]] for column in self.lazy_columns[1:] if column.keys]
+        self.static_bounds = sorted(first for first in firsts if first != float("inf"))
+
+        entries = set(self.registry.entries)
+        self.hidden &= entries
+        self.target &= entries
+        # rows were inserted next to their neighbours, not into the column they belong in
+        self.bounds = None
+        query, self.query = self.query, None
+        self.filter(query)
+
+    def matches(self, query: str) -> list:
+        if self.mode == "prefix":
+            return self.index.prefix(query)
+        return self.index.search(query)
+
+    def filter(self, query: str) -> list:
+        """
+        shows only the rows whose key matches query, all rows for an empty query. The first step of rows is changed
+        right away, the rest on the event loop
+        :return: matching keys
+        """
+        query = query.strip()
+        if query == self.query:
+            return list(self.keys)
+        self.query = query
+
+        self.keys = keys = self.matches(query) if query else list(self.index.keys)
+        target = self.all_keys.difference(keys) if query else set()
+        # rows whose visibility changes, including the ones an earlier keystroke didn't get to yet
+        changed = self.hidden.symmetric_difference(target)
+        self.target = target
+
+        if self.balance_columns:
+            bounds = self.column_bounds(keys)
+            if self.bounds is None:
+                changed.update(key for key in self.order if key not in target and
+                               self.column_of[key] != bisect_right(bounds, self.rank[key]))
+            else:
+                # visible rows only change columns between the old and the new first row of a column
+                for old, new in zip(self.bounds, bounds):
+                    if old != new:
+                        start = bisect_left(self.order_ranks, min(old, new))
+                        end = bisect_left(self.order_ranks, max(old, new))
+                        changed.update(self.order[start:end])
+            self.bounds = bounds
+
+        for column in self.lazy_columns:
+            column.visible_keys = set(keys) if query else None
+
+        self.queue(changed)
+        # the time since the last step was spent waiting for this keystroke
+        self.step_started = None
+        self.step()
+        return list(keys)
+
+    def column_bounds(self, keys: list) -> list:
+        """
+        :param keys: matching keys in file order
+        :return: rank of the first row of every column after the first, once the visible rows are split like
+                 divide_elements() splits the rows when the panel is built, inf for columns left empty
+        """
+        placed = keys if len(self.column_of) == len(self.rank) else [key for key in keys if key in self.column_of]
+        size, remainder = divmod(len(placed), len(self.columns))
+
+        bounds = []
+        start = 0
+        for i in range(len(self.columns) - 1):
+            start += size + (1 if i < remainder else 0)
+            bounds.append(self.rank[placed[start]] if start < len(placed) else float("inf"))
+        return bounds
+
+    def queue(self, keys: set):
+        # merged with the keys left from the last query, in file order per column so each column fills from the top
+        for lane, position in zip(self.pending, self.positions):
+            keys.update(lane[position:])
+        # sorted as ranks, cheaper than sorting the keys by rank
+        rank = self.rank
+        ranks = sorted([rank[key] for key in keys if key in rank])
+        index_keys = self.index.keys
+        keys = [index_keys[position] for position in ranks]
+
+        cuts = [0] + [bisect_left(ranks, bound) for bound in (self.bounds if self.balance_columns else
+                                                               self.static_bounds)] + [len(keys)]
+        self.pending = [keys[start:end] for start, end in zip(cuts, cuts[1:])]
+        self.positions = [0] * len(self.pending)
+
+    def remaining(self) -> int:
+        """
+        :return: number of queued rows not checked yet, 0 once the panel shows the current query
+        """
+        return sum(len(lane) - position for lane, position in zip(self.pending, self.positions))
+
+    def step(self) -> bool:
+        """
+        changes the next step_rows queued rows and queues the next step on the event loop
+        :return: True if every queued row is changed
+        """
+        self.step_timer.stop()
+
+        # the last step and the layout/repaint after it took 1 turn of the event loop, steps are sized to TURN_SECONDS
+        now = time.perf_counter()
+        if self.step_started is not None:
+            scale = min(max(self.TURN_SECONDS / max(now - self.step_started, 1e-6), 0.5), 2.0)
+            self.step_rows = min(max(int(self.step_rows * scale), self.MIN_STEP_ROWS), self.MAX_STEP_ROWS)
+        self.step_started = now
+
+        if self.change_rows(self.step_rows):
+            self.step_started = None
+            return True
+
+        self.step_timer.start()
+        return False
+
+    def finish(self):
+        """
+        changes every queued row right away, for code that reads the rows' visibility after setting a query
+        """
+        self.step_timer.stop()
+        self.step_started = None
+        self.change_rows(None)
+
+    def change_rows(self, limit: Union[int, None]) -> bool:
+        """
+        :param limit: rows to show/hide/move at most, None for all
+        :return: True if every queued row is changed
+        """
+        # showing a widget activates its parent's layout right away, with the layouts disabled that happens once on
+        # the event loop instead of once per row
+        layouts = [self.options_widget.layout()] + [column.layout for column in self.lazy_columns]
+        for layout in layouts:
+            layout.setEnabled(False)
+        self.touched = set()
+        changed = 0
+        done = False
+        try:
+            while not done and (limit is None or changed < limit):
+                # 1 row of every column per round
+                done = True
+                for i, lane in enumerate(self.pending):
+                    position = self.positions[i]
+                    if position < len(lane):
+                        self.positions[i] = position + 1
+                        changed += self.change_row(lane[position])
+                        done = False
+
+            # an empty block would still take the column's spacing
+            hidden = self.hidden
+            for block in self.touched:
+                visible = not hidden.issuperset(block.keys)
+                if block.widget.isHidden() == visible:
+                    block.widget.setVisible(visible)
+        finally:
+            for layout in itertools.chain((block.layout for block in self.touched), layouts):
+                layout.setEnabled(True)
+                layout.update()
+            self.touched = set()
+
+        if not done and self.remaining():
+            return False
+
+        self.pending = []
+        self.positions = []
+        # matching rows of lazy columns may not be created yet
+        for column in self.lazy_columns:
+            column.fill_view()
+        self.filtered.emit(list(self.keys))
+        return True
+
+    def touch(self, block: RowBlock):
+        if block not in self.touched:
+            block.layout.setEnabled(False)
+            self.touched.add(block)
+
+    def change_row(self, key: str) -> bool:
+        """
+        :return: True if the row was moved or shown/hidden
+        """
+        changed = False
+        visible = key not in self.target
+        if visible and self.balance_columns and key in self.column_of:
+            column = bisect_right(self.bounds, self.rank[key])
+            if self.column_of[key] != column:
+                self.move_row(key, column)
+                changed = True
+
+        if visible != (key not in self.hidden):
+            block = self.block_of.get(key)
+            if block is not None:
+                self.touch(block)
+            self.set_visible(key, visible)
+            if visible:
+                self.hidden.discard(key)
+            else:
+                self.hidden.add(key)
+            changed = True
+
+        return changed
+
+    def set_visible(self, key: str, visible: bool):
+        widgets = self.widgets.get(key)
+        if widgets is None:
+            entry = self.registry.get(key)
+            if entry is None or not entry.row:
+                return
+            widgets = self.widgets[key] = row_widgets(entry.row)
+
+        for widget in widgets:
+            widget.setVisible(visible)
+
+    def move_row(self, key: str, target: int) -> tuple:
+        """
+        :return: RowBlock the row was taken out of, RowBlock it was put in
+        """
+        entry = self.registry.get(key)
+        rank = self.rank[key]
+
+        source = block = self.block_of[key]
+        self.touch(source)
+        position = bisect_left(block.ranks, rank)
+        take_element(block.layout, entry.row)
+        del block.keys[position]
+        del block.ranks[position]
+
+        # the block whose rows come before and after it in file order, rows from the columns in front of it go to
+        # the front of its first block
+        column = self.columns[target]
+        block = column.blocks[max(bisect_right(column.firsts, rank) - 1, 0)]
+        self.touch(block)
+        position = bisect_left(block.ranks, rank)
+        insert_element(block.layout, position, entry.row)
+        block.keys.insert(position, key)
+        block.ranks.insert(position, rank)
+        # moving it to another block widget hid it
+        entry.row.show()
+        if key in self.hidden:
+            self.hidden.discard(key)
+
+        entry.column = block.layout
+        self.column_of[key] = target
+        self.block_of[key] = block
+        return source, block
+
+
+def file_stamp(path: str) -> Union[tuple, None]:
+    try:
+        file_stat = os.stat(path)
+    except OSError:
+        return None
+
+    # records autosaved by other instances change what the file loads as too
+    try:
+        journal_stat = os.stat(path + JOURNAL_SUFFIX)
+    except OSError:
+        return file_stat.st_mtime_ns, file_stat.st_size
+    return file_stat.st_mtime_ns, file_stat.st_size, journal_stat.st_mtime_ns, journal_stat.st_size
+
+
+class SettingsFileWatcher(QObject):
+    """
+    Watches the TXT file(s) of a create_options_UI(watch=True) panel and reloads them into the panel in place
+
+    Changes are debounced, and the files are only parsed again when an mtime/size differs from the last reload,
+    so the panel's own saves (and editors that write a file several times) don't cause extra work.
+    For a LayeredSettingsModel panel every layer is watched and the merged view is reloaded
+    """
+    # keys that changed, were added or were removed by a reload
+    reloaded = pyqtSignal(list)
+
+    def __init__(self, options_widget: QWidget, path: [str, list], debounce: int = 300):
+        super().__init__(options_widget)
+        self.options_widget = options_widget
+        self.paths = [os.path.abspath(path) for path in ([path] if isinstance(path, str) else path)]
+        self.path = self.paths[-1]
+        self.stamps = [file_stamp(path) for path in self.paths]
+
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(debounce)
+        self.timer.timeout.connect(self.reload)
+
+        # the directories too, atomic saves replace the file and the watch on the old one is dropped
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPaths(sorted({os.path.dirname(path) for path in self.paths}))
+        self.watch_file()
+        self.watcher.fileChanged.connect(self.schedule)
+        self.watcher.directoryChanged.connect(self.schedule)
+
+    def watch_file(self):
+        files = self.watcher.files()
+        for path in self.paths:
+            if path not in files and os.path.exists(path):
+                self.watcher.addPath(path)
+
+    def schedule(self, *args):
+        self.watch_file()
+        self.timer.start()
+
+    def stop(self):
+        # no more reloads, the panel shows something else now
+        self.timer.stop()
+        self.watcher.fileChanged.disconnect()
+        self.watcher.directoryChanged.disconnect()
+
+    def reload(self) -> list:
+        stamps = [file_stamp(path) for path in self.paths]
+        if stamps == self.stamps or all(stamp is None for stamp in stamps):
+            return []
+        self.stamps = stamps
+
+        model = getattr(self.options_widget, "settings_model", None)
+        if isinstance(model, LayeredSettingsModel):
+            layers = read_layers(model.paths, schema=model.schema)
+            # merged view of the new layers, lowest layer's key order first
+            keys = reload_settings(self.options_widget, dict(ChainMap(*reversed(layers))))
+            model.replace_layers(layers)
+        else:
+            options = load_options(self.path, schema=model.schema if model is not None else None)
+            if options is None:
+                return []
+            keys = reload_settings(self.options_widget, options)
+
+        if keys:
+            self.reloaded.emit(keys)
+        return keys
+
+
+class FirstShowTimer(QObject):
+    """
+    Reports the time from a panel's first show event to its first paint as its own instrumentation report
+    """
+    def __init__(self, widget: QWidget):
+        super().__init__(widget)
+        self.start = None
+        widget.installEventFilter(self)
+
+    def eventFilter(self, obj, event) -> bool:
+        if event.type() == QEvent.Show and self.start is None:
+            self.start = time.perf_counter()
+
+        elif event.type() == QEvent.Paint and self.start is not None:
+            report = InstrumentationReport("create_options_UI first show")
+            report.seconds = time.perf_counter() - self.start
+            report.add_phase("first show", report.seconds)
+            deliver_report(report)
+
+            obj.removeEventFilter(self)
+            self.deleteLater()
+
+        return False
+
+
+def count_created_elements(report: InstrumentationReport, registry: SettingsRegistry):
+    # widgets (labels and group boxes included) and row layouts per data type of the rows that have widgets
+    for entry in registry.entries.values():
+        if not entry.widgets:
+            continue
+
+        data_type = "combo" if entry.kind == "combo" else type(registry.model.values.get(entry.key)).__name__
+        extra = 1 if entry.kind in ("edit", "spin", "list", "radio") else 0
+        report.count(f"widgets {data_type}", len(entry.widgets) + extra)
+        report.count(f"layouts {data_type}")
+
+
+@instrumented("create_options_UI")
+def create_options_UI(user_path: str = None, columns: int = 0, inner_key_font: QFont() = None,
+                      inner_format: dict = None, outer_format: dict = None, save_default_buttons: bool = False, default_path: str = None,
+                      lazy: bool = False, lazy_batch_size: int = 50, background: bool = False, options: dict = None,
+                      model: SettingsModel = None, watch: bool = False, watch_debounce: int = 300,
+                      sidecar: bool = False, search: [bool, str] = False, sources: list = None,
+                      autosave: bool = False, schema: [str, SettingsSchema] = None, reuse: QWidget = None,
+                      profiles: SettingsProfiles = None):
+
+    """
+    This program mainly for creating easy to add options settings in any program you want to have user defined settings
+
+    :param user_path:  ------- Path to user settings TXT file
+
+    :param columns: -------- Number of columns you want elements to be separated into so all the widgets
+                    aren't all in 1 big list on the UI
+
+    :param inner_key_font: --------Qfont() for labels for the widgets
+
+    :param inner_format: -------- For formatting inner element layouts by datatype, takes the form of:
+                        {str: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": stretch}}
+                        spacing = provides spacing between elements must be an integer value
+                        label_alignment = must be a Qt.Alignment flag to give label alignment
+                        widget_alignment = must be a Qt.Alignment flag to give widget alignment
+                        front_end_stretch / backend_stretch = only accepts "stretch" for value if you want to .addstretch() to layout
+
+    :param outer_format: ------- For formatting outer element layouts, takes the form of:
+                        {"front_end_stretch": None, "spacing": None,  "backend_stretch": "stretch"}
+                        if you want to addstretch() to layout, put in "stretch", if you want spacing to front or end
+                        of layout add integer value.
+                        NOTE: At this time can't put spacing between elements of the layout
+
+    :param save_default_buttons: -------- Adds Save/Reset Default buttons
+
+    :param default_path:  ------- Path to default settings TXT file
+
+    :param lazy: -------- Only create widgets for rows scrolled into view, each column becomes a scroll area and
+                 the rest of the rows are kept as parsed values until needed, save writes those values as is
+
+    :param lazy_batch_size: -------- Number of rows created at a time in lazy mode
+
+    :param background: -------- Save/Reset Default buttons read and write the files on a worker thread,
+                       see background_io() for the saved/failed signals
+
+    :param options: -------- Already parsed options (load_options()) to build from instead of reading the paths
+
+    :param model: -------- SettingsModel to build from and bind the widgets to, the panel's model is
+                  available as .settings_model either way
+
+    :param watch: -------- Reload the panel when its TXT file changes on disk, only the changed widgets are updated
+                  and only the rows of added/removed keys are created/deleted, see SettingsFileWatcher
+
+    :param watch_debounce: -------- Milliseconds to wait for more changes before reloading
+
+    :param sidecar: -------- Load the TXT file through its binary sidecar cache (<file>.cache, written on the first
+                    load and rebuilt when the file changes), unchanged files skip text parsing on startup
+
+    :param search: -------- Adds a search box above the settings that hides the rows whose key doesn't contain the
+                   text (case-insensitive), "prefix" to match the start of the keys only. See SettingsSearch
+
+    :param sources: -------- Settings TXT files layered lowest first, e.g. [site defaults, default file, user file].
+                    Each key shows the value of the highest file that has it, the last file is the user file
+                    (user_path if not given) and only stores the keys that differ from the files below it.
+                    Reset Defaults drops the user's overrides. See LayeredSettingsModel
+
+    :param autosave: -------- Save every edit as it happens, appended to a journal next to the user file
+                     (<file>.journal) that loads replay and that gets compacted into the file from time to time,
+                     see journal_settings_updates()
+
+    :param schema: -------- Schema TXT file (or a SettingsSchema) declaring each key's type, limits and choices.
+                   Values load as the declared types, spin boxes get the declared limits/decimals and saves that
+                   would break it write nothing and emit settings_registry.validation_failed. See SettingsSchema
+
+    :param reuse: -------- Panel from an earlier create_options_UI() call to rebuild for another settings file or
+                  profile, it's returned with the new rows, which reuse its widgets by type instead of creating them
+                  again. Counters are in .widget_pool.stats(), see WidgetPool
+
+    :param profiles: -------- SettingsProfiles to show the active profile of, switch_profile() changes it in place by
+                     setting only the keys that differ. Saves (and autosave/Save Default) write the active profile's
+                     file
+
+    :return: QWidget
+    """
+
+    report = active_report()
+
+    # read given txt file to extract options with their data types
+    with timed(report, "load"):
+        if isinstance(schema, str):
+            schema = load_schema(schema)
+
+        if sources and model is None:
+            model = LayeredSettingsModel.load(sources, sidecar=sidecar, schema=schema)
+            user_path = user_path or model.path
+
+        if profiles is not None and model is None:
+            model = profiles.model()
+            user_path = user_path or model.path
+
+        if model is not None:
+            options = model.values
+        elif options is not None:
+            pass
+        elif user_path:
+            options = load_options(user_path, sidecar=sidecar, schema=schema)
+        elif default_path:
+            options = load_options(default_path, sidecar=sidecar, schema=schema)
+
+    if options is None:
+        print("ERROR NO VALID PATHS PASSED")
+
+    # changes inner format if user passes in new values
+    inner_format = inner_element_format(inner_format)
+
+    # change outer format if user passes in new values
+    outer_format = outer_element_format(outer_format)
+
+    if model is None:
+        model = SettingsModel(dict(options), path=user_path or default_path)
+    if schema is not None:
+        model.schema = schema
+
+    # turns all options into UI elements based on datatypes, registry indexes the widgets by key for save/reset
+    registry = SettingsRegistry(model=model)
+    if reuse is not None:
+        # a shown panel would lay out and move its widgets one at a time while the rows change
+        reuse_shown = reuse.isVisible()
+        if reuse_shown:
+            reuse.hide()
+        registry.pool = getattr(reuse, "widget_pool", None) or WidgetPool()
+        registry.pool.release_panel(reuse)
+    lazy_columns = []
+    if lazy:
+        # rows stay parsed values, each column creates its widgets when they scroll into view
+        for key, value in options.items():
+            registry.register_value(key, value)
+
+        for keys in divide_elements(list(options), columns):
+            column = LazyColumn(keys, registry, key_font=inner_key_font, inner_format=inner_format,
+                                outer_format=outer_format, batch_size=lazy_batch_size)
+            for key in keys:
+                registry.get(key).column = column
+            lazy_columns.append(column)
+
+        divided = [[column.scroll] for column in lazy_columns]
+
+    else:
+        # inner layouts are timed on their own inside the loop
+        widgets_start = time.perf_counter()
+        inner_layouts_before = report.phases.get("inner layouts", 0.0) if report is not None else 0.0
+
+        total_elements = []
+        element_keys = []
+        for key, value in options.items():
+
+            element = return_UI_element(key, value, key_font=inner_key_font, inner_format=inner_format, registry=registry)
+            if search:
+                element = row_container(element)
+            if element:
+                total_elements.append(element)
+                element_keys.append(key)
+
+        if report is not None:
+            inner_layouts = report.phases.get("inner layouts", 0.0) - inner_layouts_before
+            report.add_phase("widgets", time.perf_counter() - widgets_start - inner_layouts)
+
+        # divide elements into columns if user doesn't want all UI elements in a big long vertical list
+        divided = divide_elements(total_elements, columns)
+        divided_keys = divide_elements(element_keys, columns)
+
+    outer_layouts_start = time.perf_counter()
+
+    # widget to be passed to window, no repaints while the finished layout tree gets attached to it
+    upper_widget = reuse if reuse is not None else QWidget()
+    upper_widget.setUpdatesEnabled(False)
+    upper_widget.settings_registry = registry
+    upper_widget.settings_model = model
+    upper_widget.lazy_columns = lazy_columns
+    upper_widget.widget_pool = registry.pool
+    upper_widget.settings_profiles = profiles
+    # rows added by a reload are created with the same fonts/formats
+    registry.key_font = inner_key_font
+    registry.inner_format = inner_format
+    registry.row_containers = bool(search) and not lazy
+
+    save_layout = None
+    if save_default_buttons and default_path:
+        save_layout = create_default_buttons(default_path=default_path, user_path=user_path, option_items_upper_widget=upper_widget,
+                                             background=background)
+
+    # if more than 1 column of elements to split
+    if len(divided) >= 2:
+        upper_vert_layout = QVBoxLayout()
+        
+        column_elements = []
+        for position, i in enumerate(divided):
+            if lazy:
+                # outer format is already applied inside the scroll areas
+                VLayout = create_layout(*i, layout=QVBoxLayout())
+            elif search:
+                VLayout = build_outer_element(set_row_blocks(registry, divided_keys[position], i),
+                                              outer_format=outer_format, layout=QVBoxLayout())
+            else:
+                VLayout = build_outer_element(i, outer_format=outer_format, layout=QVBoxLayout())
+                set_row_columns(registry, divided_keys[position], i, VLayout)
+            column_elements.append(VLayout)
+
+            # vertical line for separation between each "column" of elements, don't add qframe to end
+            if position + 1 != len(divided):
+                frame = QFrame()
+                frame.setFrameShape(QFrame.VLine)
+                frame.setFrameShadow(QFrame.Sunken)
+                column_elements.append(frame)
+
+        if lazy:
+            layout = create_layout(*column_elements, layout=QHBoxLayout())
+        else:
+            layout = build_outer_element(column_elements, outer_format=outer_format, layout=QHBoxLayout())
+
+        upper_vert_layout.addLayout(layout)
+        if save_layout:
+            upper_vert_layout.addLayout(save_layout)
+
+        upper_widget.setLayout(upper_vert_layout)
+        search_layout = upper_vert_layout
+        search_columns = lazy_columns or [column for column in column_elements if isinstance(column, QLayout)]
+
+    # if only 1 column
+    if len(divided) <= 1:
+
+        if lazy:
+            upper_layout = create_layout(*divided[0], layout=QVBoxLayout())
+        elif search:
+            upper_layout = build_outer_element(set_row_blocks(registry, divided_keys[0] if divided_keys else [],
+                                                              divided[0]),
+                                               outer_format=outer_format, layout=QVBoxLayout())
+        else:
+            upper_layout = build_outer_element(divided[0], outer_format=outer_format, layout=QVBoxLayout())
+            set_row_columns(registry, divided_keys[0] if divided_keys else [], divided[0], upper_layout)
+        if save_layout:
+            upper_layout.addLayout(save_layout)
+
+        upper_widget.setLayout(upper_layout)
+        search_layout = upper_layout
+        search_columns = lazy_columns or [upper_layout]
+
+    if search:
+        upper_widget.settings_search = SettingsSearch(upper_widget, registry, search_columns,
+                                                      mode="prefix" if search == "prefix" else "substring")
+        search_layout.insertWidget(0, upper_widget.settings_search.line)
+
+    upper_widget.setUpdatesEnabled(True)
+
+    # lazy rows still to be created take what's left in the pool, up to 1 batch per column of each type
+    if registry.pool is not None:
+        if lazy:
+            registry.pool.trim(lazy_batch_size * len(lazy_columns))
+            registry.pool.hide_idle()
+        else:
+            registry.pool.trim()
+    if reuse is not None and reuse_shown:
+        upper_widget.show()
+
+    if autosave and (user_path or default_path):
+        registry.settings_changed.connect(lambda keys: save_settings(default_path, upper_widget, user_path,
+                                                                     journal=True))
+
+    # databases (sqlite: paths) aren't watched
+    if watch and model.path and not is_sqlite_path(model.path):
+        watch_paths = model.paths if isinstance(model, LayeredSettingsModel) else model.path
+        upper_widget.settings_watcher = SettingsFileWatcher(upper_widget, watch_paths, debounce=watch_debounce)
+
+    if report is not None:
+        report.add_phase("outer layouts", time.perf_counter() - outer_layouts_start)
+        count_created_elements(report, registry)
+        FirstShowTimer(upper_widget)
+
+    return upper_widget
+
+
+def set_row_columns(registry: SettingsRegistry, keys: list, elements: list, column: QLayout):
+    for key, element in zip(keys, elements):
+        entry = registry.get(key)
+        entry.row = element
+        entry.column = column
+
+
+def create_layout(*args, layout: QLayout) -> QLayout:
+    """
+    :param args:  List of elements to add to the layout.
+                  Supported types: QWidget, Layouts, AlignmentFlags, int (for spacing), "stretch" (add .addStretch()
+                  with no parameters)
+    :param layout:  QHBoxLayout, QVBoxLayout mainly supported, may work for other layouts
+    :return:  Returns Layout with added elements/flags/spacing/stretching
+    """
+
+    for position, i in enumerate(args):
+        if isinstance(i, QWidget):
+            layout.addWidget(i)
+        elif isinstance(i, QLayout):
+            layout.addLayout(i)
+
+        # add alignment for previous element
+        elif isinstance(i, Qt.AlignmentFlag):
+            try:
+                layout.setAlignment(args[position - 1], i)
+            except:
+                pass
+
+        elif type(i) == int:
+            layout.addSpacing(i)
+        elif type(i) == str:
+            if i.upper() == "STRETCH":
+                layout.addStretch()
+
+    return layout
+
+
+def return_UI_element(key: str, value: [tuple, str, int, float, list], key_font: QFont()=None,
+                      inner_format: dict=None, registry: SettingsRegistry = None) -> Union[QWidget, QLayout, None]:
+    element = None
+    kind = None
+    widgets = None
+
+    pool = registry.pool if registry is not None else None
+
+    # spin box limits the schema declares for key, the defaults otherwise
+    schema = registry.model.schema if registry is not None else None
+    field = schema.fields.get(key) if schema is not None else None
+    if field is not None:
+        minimum, maximum, decimals = field.limits(item=type(value) == list)
+    else:
+        minimum, decimals = DEFAULT_LIMITS["minimum"], DEFAULT_LIMITS["decimals"]
+        maximum = DEFAULT_LIMITS["item maximum" if type(value) == list else "maximum"]
+
+    if type(value) == str:
+        label = create_element_label(key, key_font, inner_format[str]["label_alignment"], pool=pool)
+
+        line = new_widget(QLineEdit, pool)
+        line.setText(value)
+        line.setObjectName(key + "_edit")
+        kind, widgets = "edit", [line]
+
+        element = build_inner_element(data_type=str, inner_format=inner_format, label=label, widget=line, layout=QHBoxLayout())
+
+    elif type(value) == int:
+        label = create_element_label(key, key_font, inner_format[int]["label_alignment"], pool=pool)
+
+        spin = new_widget(QSpinBox, pool)
+        spin.setMinimum(int(minimum))
+        spin.setMaximum(int(maximum))
+        spin.setValue(value)
+        spin.setObjectName(key + "_spin")
+        kind, widgets = "spin", [spin]
+
+        element = build_inner_element(data_type=int, inner_format=inner_format, label=label, widget=spin, layout=QHBoxLayout())
+
+    elif type(value) == float:
+        label = create_element_label(key, key_font, inner_format[float]["label_alignment"], pool=pool)
+
+        spin = new_widget(QDoubleSpinBox, pool)
+        spin.setDecimals(decimals)
+        spin.setMinimum(minimum)
+        spin.setMaximum(maximum)
+        spin.setValue(value)
+        spin.setObjectName(key + "_spin")
+        kind, widgets = "spin", [spin]
+
+        element = build_inner_element(data_type=float, inner_format=inner_format, label=label, widget=spin, layout=QHBoxLayout())
+
+    elif type(value) == bool:
+        check = new_widget(QCheckBox, pool)
+        check.setText(key)
+        check.setObjectName(key + "_check")
+        check_state = Qt.Checked if value == True else Qt.Unchecked
+        if pool is not None:
+            pool.set_check_state(check, check_state)
+        else:
+            check.setCheckState(check_state)
+        kind, widgets = "check", [check]
+
+        element = build_inner_element(data_type=bool, inner_format=inner_format, widget=check, layout=QHBoxLayout())
+
+    elif type(value) == list:
+        if type(value[0]) != list:
+            label = create_element_label(key, key_font, inner_format[list]["label_alignment"], pool=pool)
+
+            total = []
+            for position, i in enumerate(value):
+                if type(i) == int:
+                    spin = new_widget(QSpinBox, pool)
+                    spin.setMinimum(int(minimum))
+                    spin.setMaximum(int(maximum))
+                    spin.setValue(i)
+                    spin.setObjectName(key + str(position) + "_spin")
+                    total.append(spin)
+
+                elif type(i) == float:
+                    spin = new_widget(QDoubleSpinBox, pool)
+                    spin.setMinimum(minimum)
+                    spin.setMaximum(maximum)
+                    spin.setDecimals(decimals)
+                    spin.setValue(i)
+                    spin.setObjectName(key + str(position) + "_spin")
+                    total.append(spin)
+
+                elif type(i) == str:
+                    line = new_widget(QLineEdit, pool)
+                    line.setText(i)
+                    line.setObjectName(key + str(position) + "_edit")
+                    total.append(line)
+
+            if len(total) != 0:
+                kind, widgets = "list", total
+                element = build_inner_element(data_type=list, inner_format=inner_format, label=label, widget=total, layout=QHBoxLayout())
+
+        else:
+            if type(value[0]) == list:
+                combo = new_widget(QComboBox, pool)
+                # items except last one, which will be the active index
+                items = value[0][:-1]
+                combo.addItems(items)
+
+                if value[0][-1].isdigit:
+                    combo.setCurrentIndex(int(value[0][-1]))
+
+                combo.setObjectName(key + "_combo")
+                kind, widgets = "combo", [combo]
+
+                # reuse bool data type argument for this one
+                element = build_inner_element(data_type=bool, inner_format=inner_format, widget=combo, layout=QHBoxLayout())
+
+    elif type(value) == tuple:
+        group = new_widget(QGroupBox, pool)
+        group.setTitle(key)
+        group.setObjectName(key + "_group")
+
+        radio_buttons = []
+        for position, i in enumerate(value):
+            if i.upper() != "TRUE":
+                radio = new_widget(QRadioButton, pool, parent=group)
+                radio.setText(i)
+                radio.setObjectName(key + str(position) + "_radio")
+                radio_buttons.append(radio)
+
+        if len(radio_buttons) != 0:
+            group_layout = build_inner_element(data_type=tuple, inner_format=inner_format, widget=radio_buttons, layout=QVBoxLayout())
+            group.setLayout(group_layout)
+
+        # checked once the buttons are in the group, a reused button still in another group box would uncheck its
+        # auto-exclusive siblings there
+        radio_buttons[radio_check_index(value)].setChecked(True)
+
+        kind, widgets = "radio", radio_buttons
+        element = group
+
+    if registry is not None and kind:
+        registry.register(key, kind, widgets)
+
+    return element
+
+
+# for building the options to pass into create_layout function
+def build_inner_element(data_type: type, inner_format: dict, label: QLabel=None
+                        , widget: Union[QWidget, list, tuple]=None, layout: QLayout=None) -> QLayout:
+
+    report = active_report()
+    if report is not None:
+        start = time.perf_counter()
+
+    spacing = inner_format[data_type]["spacing"]
+    widget_alignment = inner_format[data_type]["widget_alignment"]
+    front_stretch = inner_format[data_type]["front_end_stretch"]
+    back_stretch = inner_format[data_type]["backend_stretch"]
+
+    if layout:
+        layout.setObjectName(str(hex(id(layout))))
+
+    if data_type != list and data_type != tuple:
+        element = create_layout(front_stretch, label, spacing, widget, widget_alignment, back_stretch, layout=layout)
+    elif data_type == list or data_type == tuple:
+        element = create_layout(front_stretch, label, spacing, *widget, back_stretch, layout=layout)
+
+    if report is not None:
+        report.add_phase("inner layouts", time.perf_counter() - start)
+
+    return element
+
+
+# for building the options to pass into create_layout function
+def build_outer_element(elements: list, outer_format: dict, layout: QLayout=None) -> QLayout:
+    report = active_report()
+    if report is not None:
+        report.count("layouts outer")
+
+    front_stretch = outer_format["front_end_stretch"]
+    spacing = outer_format["spacing"]
+    back_stretch = outer_format["backend_stretch"]
+
+    if layout:
+        layout.setObjectName(str(hex(id(layout))))
+
+    element = create_layout(front_stretch, spacing, *elements, spacing, back_stretch, layout=layout)
+
+    return element
+
+
+def create_element_label(key: str, font: QFont()=None, alignment: Qt.AlignmentFlag=None,
+                         pool: WidgetPool = None) -> QLabel:
+    label = new_widget(QLabel, pool)
+    label.setText(key)
+    label.setObjectName(key + "_label")
+    if font:
+        label.setFont(font)
+    elif label.testAttribute(Qt.WA_SetFont):
+        # recycled label that had another panel's key font
+        label.setFont(QFont())
+    if alignment:
+        try:
+            label.setAlignment(alignment)
+        except:
+            pass
+    elif pool is not None:
+        label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
+
+    return label
+
+
+def divide_elements(total_elements: list, divide_number: int) -> List[list]:
+    divided_elements = []
+
+    if divide_number >= 2:
+        avg_part_size = len(total_elements) // divide_number
+        remainder = len(total_elements) % divide_number
+
+        start = 0
+
+        for i in range(divide_number):
+            end = start + avg_part_size + (1 if i < remainder else 0)
+            divided_elements.append(total_elements[start:end])
+            start = end
+
+    else:
+        divided_elements.append(total_elements)
+
+    return divided_elements
+
+
+def inner_element_format(inner_format: dict=None) -> dict:
+    # default format
+    format = {str: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
+              int: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
+              float: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
+              bool: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
+              list: {"spacing": None, "label_alignment": None, "widget_alignment": None, "front_end_stretch": None, "backend_stretch": "stretch"},
+              tuple: {"spacing": None, "label_alignment": None, "widget_alignment": None,"front_end_stretch": None, "backend_stretch": "stretch"}}
+
+    # change inner formatting if user passes in new values
+    if inner_format:
+        for key, value in inner_format.items():
+            if key in format.keys():
+
+                for inner_key, new_value in value.items():
+                    if inner_key in format[key].keys():
+                        format[key][inner_key] = new_value
+
+    return format
+
+
+def outer_element_format(outer_format: dict=None) -> dict:
+    format = {"front_end_stretch": None, "spacing": None,  "backend_stretch": "stretch"}
+
+    if outer_format:
+        for key, value in outer_format.items():
+            if key in format.keys():
+                format[key] = value
+
+    return format
+
+
+def create_default_buttons(default_path: str = None, user_path: str = None, option_items_upper_widget: QWidget = None,
+                           background: bool = False) -> QLayout:
+    format = outer_element_format({"front_end_stretch": "stretch", "backend_stretch": "stretch"})
+
+    save_button = QPushButton("Save")
+    save_button.setObjectName("save_button")
+    save_button.clicked.connect(lambda: save_settings(user_path=user_path, default_path=default_path,
+                                                      options_widget=option_items_upper_widget, background=background))
+
+    default_button = QPushButton("Reset Defaults")
+    default_button.setObjectName("default_button")
+    default_button.clicked.connect(lambda: default_settings(user_path=user_path, default_path=default_path,
+                                                            options_widget=option_items_upper_widget, background=background))
+
+    save_layout = build_outer_element([save_button, default_button], outer_format=format,
+                                      layout=QHBoxLayout())
+
+    return save_layout
+
+
+@instrumented("save_settings")
+def save_settings(default_path: str, options_widget: dict, user_path: str = None, background: bool = False,
+                  journal: bool = False):
+    """
+    :param background: -------- only take the values from the widgets here, the file gets written on a worker
+                       thread by background_io()
+
+    :param journal: -------- append the changed keys to the user file's journal instead of patching the file,
+                    for saving on every edit, see journal_settings_updates()
+
+    :return: SchemaViolations if a changed value breaks the panel's schema, nothing is written then
+    """
+    # a profiles panel only ever writes the profile it shows
+    profiles = getattr(options_widget, "settings_profiles", None)
+    if profiles is not None:
+        user_path = options_widget.settings_registry.model.path
+
+    # if not user_path for user option files given, create it from the default file
+    copy_from = None
+    if not user_path:
+        user_path = default_user_path(default_path)
+        copy_from = default_path
+
+    registry = getattr(options_widget, "settings_registry", None)
+    if registry is None:
+        registry = settings_registry(options_widget, getOptions(user_path) or getOptions(default_path))
+
+    # nothing changed since the last save
+    dirty = registry.dirty_keys()
+    if not dirty:
+        return
+
+    # nothing gets written while a changed value breaks the schema, the keys stay dirty
+    violations = registry.model.validate(dirty)
+    if violations:
+        registry.validation_failed.emit(violations)
+        return violations
+
+    report = active_report()
+
+    # current values of the changed keys, from the model the widgets are bound to
+    with timed(report, "snapshot"):
+        model = registry.model
+        if isinstance(model, LayeredSettingsModel) and user_path == model.path:
+            # only the keys that differ from the layers below are kept in the user file
+            text_dict = model.override_updates(dirty)
+            copy_from = None
+        else:
+            text_dict = {}
+            for key in dirty:
+                if key in registry:
+                    text_dict[key] = registry.text(key)
+
+    registry.clear_dirty(dirty)
+
+    if journal:
+        try:
+            with timed(report, "journal"):
+                journal_settings_updates(user_path, text_dict, default_path=copy_from)
+        except BaseException:
+            registry.dirty.update(dirty)
+            raise
+        return
+
+    if background:
+        background_io().save(user_path, text_dict, registry=registry, default_path=copy_from)
+        return
+
+    try:
+        with timed(report, "write"):
+            write_settings_updates(user_path, text_dict, default_path=copy_from)
+    except BaseException:
+        registry.dirty.update(dirty)
+        raise
+
+
+@instrumented("default_settings")
+def default_settings(default_path: str, options_widget: dict, user_path: str = None, background: bool = False):
+    """
+    :param background: -------- read the default file and write the user file on a worker thread, widgets are
+                       still updated on the GUI thread once the defaults are loaded
+    """
+    # layered panel, the defaults are the layers below the user file
+    model = getattr(getattr(options_widget, "settings_registry", None), "model", None)
+    if isinstance(model, LayeredSettingsModel):
+        apply_defaults(dict(model.lower), default_path, options_widget, user_path=user_path, background=background)
+        return
+
+    if background:
+        background_io().load(default_path, lambda data_dict: apply_defaults(data_dict, default_path, options_widget,
+                                                                           user_path=user_path, background=True),
+                             schema=getattr(model, "schema", None))
+        return
+
+    # read text file to get data with datatypes
+    with timed(active_report(), "load"):
+        data_dict = load_options(default_path, schema=getattr(model, "schema", None))
+
+    apply_defaults(data_dict, default_path, options_widget, user_path=user_path)
+
+
+def apply_defaults(data_dict: dict, default_path: str, options_widget: dict, user_path: str = None,
+                   background: bool = False):
+    # objects to change values on, looked up by key
+    registry = settings_registry(options_widget, data_dict)
+
+    # change only the object values/states that differ from the default text file, in 1 batch
+    with timed(active_report(), "apply"):
+        registry.apply_values(data_dict, options_widget)
+
+    # save settings back to default for user text file, only the changed keys get written
+    save_settings(default_path=default_path, options_widget=options_widget, user_path=user_path, background=background)
+
+
+def create_options_UI_in_background(callback, **kwargs):
+    """
+    reads and parses the settings file on a worker thread, then builds the widgets with create_options_UI() on the
+    GUI thread
+    :param callback: called with the QWidget from create_options_UI() once it is built
+    :param kwargs: create_options_UI() arguments
+    """
+    path = kwargs.get("user_path") or kwargs.get("default_path")
+    # parsed with the schema's datatypes like create_options_UI() parses it, the schema file is read only once
+    if isinstance(kwargs.get("schema"), str):
+        kwargs["schema"] = load_schema(kwargs["schema"])
+    background_io().load(path, lambda options: callback(create_options_UI(options=options, **kwargs)),
+                         schema=kwargs.get("schema"))
+
+